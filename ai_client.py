@@ -1,22 +1,201 @@
-from openai import OpenAI
-from config import GROQ_API_KEY
-import json
-
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=GROQ_API_KEY,
+from openai import AsyncOpenAI
+from config import (
+    GROQ_API_KEY,
+    OPENROUTER_API_KEY,
+    LLM_MODEL_LARGE,
+    LLM_CALL_DEADLINE,
+    LLM_HEDGE_MODE,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_FALLBACK_MODEL
 )
+from model_router import estimate_tokens
+from collections import Counter, defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+# Async clients of the running task. Their connection pools belong to one event
+# loop, and every Celery task runs its own (asyncio.run), so they are not shared
+task_clients: ContextVar[Optional[Dict[str, AsyncOpenAI]]] = ContextVar("task_clients", default=None)
+
+
+@asynccontextmanager
+async def llm_clients():
+    """Scope of one task's async LLM clients; they are closed when it exits"""
+    clients = {}
+    token = task_clients.set(clients)
+    try:
+        yield
+    finally:
+        task_clients.reset(token)
+        for api_client in clients.values():
+            await api_client.close()
+
+
+def _task_client(name: str, base_url: str, api_key: str) -> AsyncOpenAI:
+    clients = task_clients.get()
+    if clients is None:
+        raise RuntimeError("Async LLM clients are only available inside llm_clients()")
+    if name not in clients:
+        # Retries go through resilience.call_with_retries, where the circuit breaker sees them
+        clients[name] = AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+    return clients[name]
+
+
+def get_async_client() -> AsyncOpenAI:
+    return _task_client("groq", GROQ_BASE_URL, GROQ_API_KEY)
+
+
+def get_fallback_client() -> Optional[AsyncOpenAI]:
+    return _task_client("openrouter", OPENROUTER_BASE_URL, OPENROUTER_API_KEY) if OPENROUTER_API_KEY else None
+
+
+# Hedging waits for the adaptive percentile only once enough latencies are known
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+DEFAULT_HEDGE_DELAY = 10.0
+
+HEDGE_OFF = "off"
+HEDGE_DUPLICATE = "duplicate"
+HEDGE_FALLBACK = "fallback"
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when an LLM call does not finish within its deadline"""
+    pass
+
+
+class LatencyTracker:
+    """Rolling per-model window of successful call latencies"""
 
-def get_ai_review(prompt: str, model: str = "llama-3.3-70b-versatile"):
-    response = client.chat.completions.create(
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, seconds: float):
+        self._samples[model].append(seconds)
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+latency_tracker = LatencyTracker()
+
+# Process-wide accounting: calls, hedges fired and won, deadlines hit and tokens spent
+usage_stats = Counter()
+# Per-review accounting, set by the task running a review; tasks it starts share the Counter
+review_usage: ContextVar[Optional[Counter]] = ContextVar("review_usage", default=None)
+
+
+async def _complete(api_client: AsyncOpenAI, prompt: str, model: str) -> Tuple[str, int]:
+    start = time.monotonic()
+    response = await api_client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
         response_format={"type": "json_object"}
     )
-    return response.choices[0].message.content
+    latency_tracker.record(model, time.monotonic() - start)
+
+    tokens = response.usage.total_tokens if response.usage else estimate_tokens(prompt)
+    return response.choices[0].message.content, tokens
+
+
+def hedge_delay(model: str) -> float:
+    """How long to wait on the primary request before firing a hedge"""
+    observed = latency_tracker.percentile(model, LLM_HEDGE_PERCENTILE)
+    if observed is None:
+        return DEFAULT_HEDGE_DELAY
+    return max(observed, LLM_HEDGE_MIN_DELAY)
+
+
+def _hedge_target(model: str, hedge_mode: str) -> Tuple[AsyncOpenAI, str]:
+    fallback_client = get_fallback_client() if hedge_mode == HEDGE_FALLBACK else None
+    if fallback_client is not None:
+        return fallback_client, LLM_FALLBACK_MODEL
+    return get_async_client(), model
+
+
+async def request_ai_review(
+    prompt: str,
+    model: str = LLM_MODEL_LARGE,
+    deadline: float = LLM_CALL_DEADLINE,
+    hedge_mode: str = LLM_HEDGE_MODE
+) -> str:
+    """
+    Get an AI review with a hard deadline and optional request hedging.
+
+    With hedging enabled, a second request (same model, or the fallback
+    provider) is fired once the primary passes the recent latency percentile
+    for its model. The first successful response wins and the other request
+    is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    usage_stats["calls"] += 1
+
+    primary = asyncio.ensure_future(_complete(get_async_client(), prompt, model))
+    hedge = None
+    pending = {primary}
+    last_error: Optional[BaseException] = None
 
-def parse_ai_response(response: str) -> dict:
     try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        return {"error": "Failed to parse AI response", "raw": response}
+        if hedge_mode != HEDGE_OFF:
+            delay = min(hedge_delay(model), deadline)
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and loop.time() < deadline_at:
+                hedge_client, hedge_model = _hedge_target(model, hedge_mode)
+                hedge = asyncio.ensure_future(_complete(hedge_client, prompt, hedge_model))
+                pending.add(hedge)
+                usage_stats["hedges"] += 1
+                # The losing request is cancelled, but its prompt has likely been billed already
+                usage_stats["hedge_tokens_estimated"] += estimate_tokens(prompt)
+                review_tokens = review_usage.get()
+                if review_tokens is not None:
+                    review_tokens["tokens"] += estimate_tokens(prompt)
+                logger.info(f"Hedging {model} request after {delay:.1f}s with {hedge_model}")
+
+        while pending:
+            remaining = deadline_at - loop.time()
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(remaining, 0),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                usage_stats["deadline_exceeded"] += 1
+                raise LLMDeadlineExceeded(f"LLM call to {model} exceeded {deadline:.1f}s deadline")
+
+            for task in done:
+                if task.exception() is None:
+                    content, tokens = task.result()
+                    usage_stats["tokens"] += tokens
+                    review_tokens = review_usage.get()
+                    if review_tokens is not None:
+                        review_tokens["tokens"] += tokens
+                    if task is hedge:
+                        usage_stats["hedge_wins"] += 1
+                    return content
+                last_error = task.exception()
+
+        raise last_error
+
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
@@ -0,0 +1,151 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from models import Review, IssueRecord
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("critical", "warning", "info")
+BACKFILL_BATCH_SIZE = 200
+# Placeholder issues of failed analyses in reviews stored before they were flagged
+PLACEHOLDER_PREFIXES = ("Review failed:", "Analysis failed:")
+
+
+def _is_placeholder(result: Dict[str, Any]) -> bool:
+    """Stand-in results of a failed or unparseable analysis, which hold no findings"""
+    if result.get("failed"):
+        return True
+    return any(
+        isinstance(issue, dict) and str(issue.get("message") or "").startswith(PLACEHOLDER_PREFIXES)
+        for issue in result.get("issues") or []
+    )
+
+
+def _issue_rows(review: Review, review_data: Dict[str, Any], reviewed_at: datetime) -> List[Dict[str, Any]]:
+    rows = []
+
+    def add(issue: Dict[str, Any], filename: Optional[str], default_type: str):
+        if not isinstance(issue, dict):
+            return
+        severity = str(issue.get("severity") or "info").lower()
+        rows.append({
+            "review_id": review.id,
+            "user_id": review.user_id,
+            "repo_url": review.repo_url,
+            "filename": filename,
+            "severity": severity if severity in SEVERITIES else "info",
+            "type": str(issue.get("type") or default_type).lower(),
+            "reviewed_at": reviewed_at
+        })
+
+    structure_review = review_data.get("structure_review") or {}
+    if not _is_placeholder(structure_review):
+        for issue in structure_review.get("issues") or []:
+            add(issue, None, "structure")
+
+    for file_review in review_data.get("file_reviews") or []:
+        if _is_placeholder(file_review):
+            continue
+        for issue in file_review.get("issues") or []:
+            add(issue, file_review.get("filename"), "style")
+
+    return rows
+
+
+def record_review_issues(db: Session, review: Review, review_data: Dict[str, Any], reviewed_at: Optional[datetime] = None):
+    """Add a completed review's issues to the analytics table; committed by the caller"""
+    db.query(IssueRecord).filter(IssueRecord.review_id == review.id).delete(synchronize_session=False)
+    rows = _issue_rows(review, review_data, reviewed_at or datetime.utcnow())
+    if rows:
+        db.bulk_insert_mappings(IssueRecord, rows)
+
+
+def backfill_review_issues(db: Session) -> int:
+    """Index the issues of completed reviews that predate the analytics table"""
+    indexed = db.query(IssueRecord.review_id).distinct()
+    review_ids = [review_id for (review_id,) in db.query(Review.id).filter(
+        Review.status == "completed", ~Review.id.in_(indexed)
+    ).order_by(Review.id).all()]
+
+    count = 0
+    for start in range(0, len(review_ids), BACKFILL_BATCH_SIZE):
+        batch = review_ids[start:start + BACKFILL_BATCH_SIZE]
+        for review in db.query(Review).filter(Review.id.in_(batch)).all():
+            try:
+                review_data = json.loads(review.review_content) if review.review_content else {}
+            except ValueError:
+                logger.warning(f"Skipping review {review.id}: unreadable review_content")
+                continue
+            record_review_issues(db, review, review_data, reviewed_at=review.updated_at or review.created_at)
+            count += 1
+        db.commit()
+
+    return count
+
+
+def _filtered(
+    db: Session,
+    columns: list,
+    user_id: int,
+    repo_url: Optional[str],
+    since: datetime,
+    severity: Optional[str],
+    issue_type: Optional[str]
+):
+    query = db.query(*columns).filter(IssueRecord.user_id == user_id, IssueRecord.reviewed_at >= since)
+    if repo_url:
+        query = query.filter(IssueRecord.repo_url == repo_url)
+    if severity:
+        query = query.filter(IssueRecord.severity == severity)
+    if issue_type:
+        query = query.filter(IssueRecord.type == issue_type)
+    return query
+
+
+def issue_analytics(
+    db: Session,
+    user_id: int,
+    since: datetime,
+    repo_url: Optional[str] = None,
+    severity: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    top_files: int = 10
+) -> Dict[str, Any]:
+    """Totals, a daily trend by severity and the files with most issues, from the issues table alone"""
+    count = func.count(IssueRecord.id)
+    filters = (user_id, repo_url, since, severity, issue_type)
+
+    by_severity = dict(_filtered(db, [IssueRecord.severity, count], *filters).group_by(IssueRecord.severity).all())
+    by_type = dict(_filtered(db, [IssueRecord.type, count], *filters).group_by(IssueRecord.type).all())
+
+    day = func.date(IssueRecord.reviewed_at)
+    trend: Dict[str, Dict[str, int]] = {}
+    for date, issue_severity, total in _filtered(
+        db, [day, IssueRecord.severity, count], *filters
+    ).group_by(day, IssueRecord.severity).order_by(day).all():
+        bucket = trend.setdefault(str(date), {"date": str(date), "total": 0, **{s: 0 for s in SEVERITIES}})
+        bucket[issue_severity] = total
+        bucket["total"] += total
+
+    critical = func.sum(case((IssueRecord.severity == "critical", 1), else_=0))
+    files = _filtered(
+        db, [IssueRecord.repo_url, IssueRecord.filename, count.label("issues"), critical.label("critical")], *filters
+    ).filter(IssueRecord.filename.isnot(None)).group_by(
+        IssueRecord.repo_url, IssueRecord.filename
+    ).order_by(count.desc(), IssueRecord.filename).limit(top_files).all()
+
+    return {
+        "totals": {
+            "total_issues": sum(by_severity.values()),
+            "by_severity": {s: by_severity.get(s, 0) for s in SEVERITIES},
+            "by_type": by_type
+        },
+        "trend": list(trend.values()),
+        "top_files": [
+            {"repo_url": repo, "filename": filename, "issues": issues, "critical": int(critical_count or 0)}
+            for repo, filename, issues, critical_count in files
+        ]
+    }
@@ -0,0 +1,113 @@
+"""
+Benchmark tree filtering on synthetic monorepo trees.
+
+Usage: python benchmarks/bench_path_filter.py [--paths 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# tasks reads configuration at import time; no connections are opened
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from path_matcher import DEFAULT_EXCLUDE_PATTERNS, PathMatcher  # noqa: E402
+from tasks import REVIEWABLE_EXTENSIONS, filter_reviewable_files  # noqa: E402
+
+GITIGNORE = [
+    "*.log", "*.tmp", ".env", "coverage/", "target/", "out/", "*.egg-info/",
+    "/vendor/", "**/generated/**", "!**/generated/keep/**", ".cache/", "tmp/",
+    "*.pyc", "docs/_build/", ".idea/", ".vscode/", "*.swp", "logs/",
+]
+REVIEWIGNORE = ["**/fixtures/**", "**/*_test_data.*", "scripts/legacy/", "*.stories.tsx"]
+
+DIRECTORIES = [
+    "src", "lib", "pkg", "services", "apps", "packages", "internal", "cmd", "web",
+    "api", "core", "utils", "components", "generated", "fixtures", "node_modules",
+    "dist", "build", "vendor", "tests", "docs", "scripts", "legacy", "handlers",
+]
+EXTENSIONS = [".py", ".ts", ".tsx", ".js", ".go", ".java", ".md", ".json", ".yml", ".png", ".log", ".rs"]
+
+
+def make_tree(count: int, seed: int = 1):
+    """Build a monorepo-like tree: a directory hierarchy with ~12 files per directory"""
+    rng = random.Random(seed)
+    directories = [""]
+    while len(directories) < max(count // 12, 1):
+        parent = rng.choice(directories)
+        if parent.count("/") >= 8:
+            continue
+        name = rng.choice(DIRECTORIES) + (str(rng.randint(0, 40)) if rng.random() < 0.5 else "")
+        directories.append(f"{parent}/{name}" if parent else name)
+
+    files = []
+    for i in range(count):
+        directory = rng.choice(directories)
+        name = f"file_{i}{rng.choice(EXTENSIONS)}"
+        files.append({"path": f"{directory}/{name}" if directory else name, "type": "blob"})
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paths", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files = make_tree(args.paths)
+
+    exclude_patterns = list(DEFAULT_EXCLUDE_PATTERNS) + GITIGNORE + REVIEWIGNORE
+    include_patterns = ["src*/**", "packages*/**", "*.tsx"]
+
+    # Baseline: the cheapest possible pass, an extension check alone
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        kept = [f for f in files if f["path"].endswith(REVIEWABLE_EXTENSIONS)]
+        timings.append((time.perf_counter() - start) * 1000)
+    report("extension check only", files, kept, timings)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        kept = legacy_filter(files)
+        timings.append((time.perf_counter() - start) * 1000)
+    report("legacy substring scan", files, kept, timings)
+
+    # Matchers are built inside the timed region so directory memoization starts cold
+    for label, excludes, includes in (
+        ("defaults", DEFAULT_EXCLUDE_PATTERNS, []),
+        ("gitignore+reviewignore", exclude_patterns, []),
+        ("gitignore+reviewignore+include", exclude_patterns, include_patterns),
+    ):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            kept = filter_reviewable_files(files, exclude=PathMatcher(excludes), include=PathMatcher(includes))
+            timings.append((time.perf_counter() - start) * 1000)
+        report(label, files, kept, timings)
+
+
+def legacy_filter(files):
+    """The substring scan filter_reviewable_files used before the compiled matcher"""
+    reviewable_files = []
+    for file in files:
+        path = file["path"]
+        if any(skip in path for skip in ['node_modules/', 'venv/', '.git/', 'dist/', 'build/', '__pycache__/']):
+            continue
+        if path.endswith(REVIEWABLE_EXTENSIONS):
+            reviewable_files.append(file)
+    return reviewable_files
+
+
+def report(label, files, kept, timings):
+    timings = sorted(timings)
+    print(f"{label:32s} paths={len(files)} kept={len(kept)} best={timings[0]:.1f}ms median={timings[len(timings) // 2]:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Load-test Socket.IO fan-out across API nodes sharing the Redis manager.
+
+Starts N uvicorn instances of main:app against a local Redis and connects
+simulated clients to them round-robin. Each client joins a review_{id} room
+as the frontend does. Emitter processes then publish review progress through
+socket_manager.emit_progress, the same path Celery workers use.
+
+Reports:
+- delivery latency percentiles, from emit to client receipt
+- per-node CPU
+- Redis pub/sub throughput
+- events delivered to clients outside the review's room
+
+Requires a Redis server and the websockets package (installed with
+uvicorn[standard]). Do not point it at a Redis a deployment uses: the
+Socket.IO channel is shared by every database number.
+
+Usage: python benchmarks/bench_socket_fanout.py [--nodes 3] [--clients 3000] [--reviews 100]
+           [--rate 2] [--duration 20] [--serializer pickle|compact] [--emit-to-room]
+           [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import redis
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+# Handshakes in flight per client process; more overflow the nodes' accept backlog
+CONNECT_CONCURRENCY = 100
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# Simulated clients: a minimal Engine.IO v4 / Socket.IO v5 client over a
+# websocket, light enough to run thousands per process
+
+async def run_client(port: int, review_id: int, stats: Counter, latencies: Counter, handshakes: asyncio.Semaphore, ready):
+    # The top-level connect exists in every websockets release uvicorn[standard] installs (>= 10.4)
+    from websockets import connect
+
+    wanted = f"review_progress_{review_id}"
+    url = f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket"
+    try:
+        async with handshakes:
+            websocket = await connect(url, max_size=None, ping_interval=None, open_timeout=60)
+    except Exception:
+        stats["failed"] += 1
+        ready()
+        return
+
+    async with websocket:
+        joined = False
+        async for message in websocket:
+            if message.startswith("42"):
+                received = time.time()
+                event, data = json.loads(message[2:])
+                if event == wanted:
+                    latencies[round((received - data["sent_at"]) * 1000, 1)] += 1
+                else:
+                    stats["unwanted"] += 1
+            elif message == "2":
+                await websocket.send("3")
+            elif message.startswith("0"):
+                await websocket.send("40")
+            elif message.startswith("40"):
+                await websocket.send(f'420["join_review",{{"review_id":{review_id}}}]')
+            elif message.startswith("43") and not joined:
+                joined = True
+                stats["joined"] += 1
+                ready()
+            elif message.startswith("44"):
+                stats["failed"] += 1
+                ready()
+                return
+
+
+async def client_main(args):
+    ports = [int(port) for port in args.ports.split(",")]
+    stats, latencies = Counter(), Counter()
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+    pending = args.clients
+    connected_cpu = 0.0
+
+    def ready():
+        nonlocal pending, connected_cpu
+        pending -= 1
+        if pending == 0:
+            connected_cpu = cpu_seconds()
+            print(f"READY {stats['joined']}", flush=True)
+
+    handshakes = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    clients = [
+        asyncio.create_task(run_client(
+            ports[index % len(ports)], index % args.reviews + 1, stats, latencies, handshakes, ready
+        ))
+        for index in range(args.first_client, args.first_client + args.clients)
+    ]
+    await stop.wait()
+    for client in clients:
+        client.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+
+    print(json.dumps({
+        **stats,
+        "latencies": {str(ms): count for ms, count in latencies.items()},
+        # Spent receiving, after every client had joined
+        "cpu_seconds": cpu_seconds() - connected_cpu
+    }), flush=True)
+
+
+# Emitters: stand-ins for Celery workers publishing review progress
+
+async def emitter_main(args):
+    from socket_manager import emit_progress, sio
+
+    padding = "x" * args.payload_bytes
+    interval = 1 / args.rate
+    start = time.monotonic()
+    end = start + args.duration
+    stats = Counter()
+    publish_seconds = []
+
+    async def emit_review(review_id: int):
+        # Staggered so reviews do not all publish at once
+        next_at = start + random.random() * interval
+        sequence = 0
+        while next_at < end:
+            await asyncio.sleep(max(next_at - time.monotonic(), 0))
+            data = {
+                "status": "reviewing_file",
+                "progress": sequence % 100,
+                "current_file": padding,
+                "sequence": sequence,
+                "sent_at": time.time()
+            }
+            published = time.perf_counter()
+            if args.emit_to_room:
+                await sio.emit(f"review_progress_{review_id}", data, room=f"review_{review_id}")
+            else:
+                await emit_progress(review_id, data)
+            publish_seconds.append(time.perf_counter() - published)
+            stats[str(review_id)] += 1
+            sequence += 1
+            next_at += interval
+
+    await asyncio.gather(*(emit_review(review_id) for review_id in range(args.first_review, args.last_review + 1)))
+    publish_seconds.sort()
+    print(json.dumps({
+        "sent": dict(stats),
+        "publish_p99_ms": publish_seconds[int(len(publish_seconds) * 0.99)] * 1000 if publish_seconds else None,
+        "cpu_seconds": cpu_seconds()
+    }), flush=True)
+
+
+# Orchestration
+
+def process_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        # Fields after the parenthesised command name; utime and stime are the 14th and 15th
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def redis_counters(client) -> dict:
+    """Publish calls and network bytes so far; servers without a statistic report None"""
+    counters = {"publishes": None, "net_input": None, "net_output": None, "subscribers": None}
+    try:
+        stats = client.info("stats")
+        counters["net_input"] = stats.get("total_net_input_bytes")
+        counters["net_output"] = stats.get("total_net_output_bytes")
+        counters["publishes"] = client.info("commandstats").get("cmdstat_publish", {}).get("calls", 0)
+        counters["subscribers"] = dict(client.pubsub_numsub("socketio")).get(b"socketio")
+    except redis.RedisError:
+        # e.g. INFO disabled by the server's configuration
+        pass
+    return counters
+
+
+def percentile(histogram: Counter, share: float) -> float:
+    total = sum(histogram.values())
+    rank = total * share / 100
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return float("nan")
+
+
+def spawn(args, role: str, *extra: str) -> subprocess.Popen:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--role", role,
+        "--reviews", str(args.reviews), "--rate", str(args.rate), "--duration", str(args.duration),
+        "--payload-bytes", str(args.payload_bytes), *extra
+    ]
+    if args.emit_to_room:
+        command.append("--emit-to-room")
+    return subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=child_env(args))
+
+
+def child_env(args) -> dict:
+    env = dict(os.environ)
+    env["REDIS_URL"] = args.redis_url
+    env["SOCKET_SERIALIZER"] = args.serializer
+    # Configuration is read at import time; the database is never used
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.setdefault("JWT_SECRET", "benchmark")
+    return env
+
+
+def start_nodes(args) -> list:
+    import httpx
+
+    nodes = []
+    for index in range(args.nodes):
+        port = args.port + index
+        nodes.append((port, subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT,
+            env=child_env(args)
+        )))
+
+    deadline = time.monotonic() + 60
+    for port, node in nodes:
+        while True:
+            if node.poll() is not None:
+                raise SystemExit(f"Node on port {port} exited with {node.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit(f"Node on port {port} did not start")
+            time.sleep(0.2)
+    return nodes
+
+
+def split(total: int, parts: int) -> list:
+    """(first, count) ranges covering total items in up to parts chunks"""
+    size, extra = divmod(total, parts)
+    ranges, first = [], 0
+    for index in range(parts):
+        count = size + (index < extra)
+        if count:
+            ranges.append((first, count))
+        first += count
+    return ranges
+
+
+def run(args):
+    redis_client = redis.Redis.from_url(args.redis_url)
+    try:
+        redis_client.ping()
+    except redis.RedisError as e:
+        raise SystemExit(f"Redis is not reachable at {args.redis_url}: {e}")
+
+    nodes = start_nodes(args)
+    clients, emitters = [], []
+    try:
+        ports = ",".join(str(port) for port, _ in nodes)
+        print(f"Nodes: {args.nodes} on ports {ports}, serializer: {args.serializer}")
+
+        started = time.monotonic()
+        for first, count in split(args.clients, args.client_procs):
+            clients.append(spawn(args, "client", "--ports", ports, "--first-client", str(first), "--clients", str(count)))
+        joined = sum(int(client.stdout.readline().split()[1]) for client in clients)
+        print(f"Clients: {joined}/{args.clients} joined in {time.monotonic() - started:.1f}s")
+
+        node_cpu = [process_cpu_seconds(node.pid) for _, node in nodes]
+        before = redis_counters(redis_client)
+        started = time.monotonic()
+        for first, count in split(args.reviews, min(args.emitter_procs, args.reviews)):
+            emitters.append(spawn(args, "emitter", "--first-review", str(first + 1), "--last-review", str(first + count)))
+        emitted = [json.loads(emitter.stdout.readline()) for emitter in emitters]
+        elapsed = time.monotonic() - started
+        node_cpu = [process_cpu_seconds(node.pid) - cpu for (_, node), cpu in zip(nodes, node_cpu)]
+        after = redis_counters(redis_client)
+
+        # Let deliveries in flight arrive before the clients stop
+        time.sleep(args.drain)
+        for client in clients:
+            client.send_signal(signal.SIGTERM)
+        received = [json.loads(client.stdout.readline()) for client in clients]
+    finally:
+        for process in clients + emitters + [node for _, node in nodes]:
+            if process.poll() is None:
+                process.terminate()
+            process.wait()
+
+    sent = Counter()
+    for result in emitted:
+        sent.update({int(review_id): count for review_id, count in result["sent"].items()})
+    members = Counter(index % args.reviews + 1 for index in range(args.clients))
+    expected = sum(sent[review_id] * members[review_id] for review_id in sent)
+
+    latencies = Counter()
+    for result in received:
+        latencies.update({float(ms): count for ms, count in result["latencies"].items()})
+    delivered = sum(latencies.values())
+    unwanted = sum(result.get("unwanted", 0) for result in received)
+    failed = sum(result.get("failed", 0) for result in received)
+
+    total_sent = sum(sent.values())
+    print(f"Events: {total_sent} sent in {elapsed:.1f}s ({total_sent / elapsed:.0f}/s), "
+          f"publish p99 {max(result['publish_p99_ms'] or 0 for result in emitted):.2f} ms")
+    print(f"Delivered: {delivered}/{expected} to room members ({delivered / max(expected, 1):.1%}), "
+          f"{unwanted} to clients outside the room, {failed} clients failed")
+    if delivered:
+        print("Latency ms: " + "  ".join(f"p{share:g} {percentile(latencies, share):.1f}" for share in PERCENTILES)
+              + f"  max {max(latencies):.1f}")
+    for (port, _), cpu in zip(nodes, node_cpu):
+        print(f"Node {port}: cpu {cpu / elapsed:.0%}")
+    client_cpu = max(result["cpu_seconds"] for result in received) / (elapsed + args.drain)
+    print(f"Busiest client process: cpu {client_cpu:.0%} (near 100% means the clients, not the nodes, are the limit)")
+
+    if before["publishes"] is not None and after["publishes"] is not None:
+        publishes = after["publishes"] - before["publishes"]
+        line = f"Redis: {publishes / elapsed:.0f} publishes/s"
+        if after["subscribers"]:
+            line += f", {publishes * after['subscribers'] / elapsed:.0f} pub/sub messages out/s ({after['subscribers']} subscribers)"
+        if before["net_output"] is not None:
+            line += (f", net in {(after['net_input'] - before['net_input']) / elapsed / 1e6:.2f} MB/s"
+                     f" out {(after['net_output'] - before['net_output']) / elapsed / 1e6:.2f} MB/s")
+        print(line)
+    else:
+        print("Redis: statistics unavailable (INFO not supported)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=3000)
+    parser.add_argument("--reviews", type=int, default=100, help="rooms; clients are spread over them evenly")
+    parser.add_argument("--rate", type=float, default=2, help="progress events per second per review")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of emitting")
+    parser.add_argument("--payload-bytes", type=int, default=200)
+    parser.add_argument("--serializer", choices=["pickle", "compact"], default="pickle")
+    parser.add_argument("--emit-to-room", action="store_true",
+                        help="emit to the review_{id} room instead of through emit_progress, for comparison")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--port", type=int, default=18000, help="first node port")
+    parser.add_argument("--client-procs", type=int, default=4)
+    parser.add_argument("--emitter-procs", type=int, default=2)
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for deliveries after emitting")
+    # Internal: child process roles
+    parser.add_argument("--role", choices=["client", "emitter"], help=argparse.SUPPRESS)
+    parser.add_argument("--ports", help=argparse.SUPPRESS)
+    parser.add_argument("--first-client", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--first-review", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--last-review", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Every simulated client and its server side hold a socket; children inherit the limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        print(f"(open file limit stays at {soft}; raise it for large --clients)")
+
+    if args.role == "client":
+        asyncio.run(client_main(args))
+    elif args.role == "emitter":
+        asyncio.run(emitter_main(args))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark API cold start: import time of main and time until /health answers,
+each measured in a fresh interpreter. Also lists heavy modules that were
+loaded by startup even though the API does not need them.
+
+Usage: python benchmarks/bench_startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the Celery worker needs
+HEAVY_MODULES = ("celery", "openai", "tasks", "ai_client")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+ready = time.perf_counter()
+heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({"import": imported - start, "ready": ready - start, "heavy": heavy}))
+"""
+
+
+def run_probe() -> dict:
+    env = dict(os.environ)
+    # Configuration is read at import time; no connections are opened
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.setdefault("JWT_SECRET", "benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # One unmeasured run warms the bytecode and OS file caches
+    run_probe()
+    results = [run_probe() for _ in range(args.runs)]
+
+    report("import main", [r["import"] for r in results])
+    report("ready (/health answered)", [r["ready"] for r in results])
+    heavy = results[-1]["heavy"]
+    print(f"heavy modules loaded at startup: {', '.join(heavy) if heavy else 'none'}")
+
+
+def report(label, timings):
+    timings = sorted(t * 1000 for t in timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:28s} runs={len(timings)} best={timings[0]:.0f}ms median={timings[len(timings) // 2]:.0f}ms p95={p95:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from config import BUDGET_MAX_CONCURRENCY
+from model_router import STAGE_FILE, TIER_SMALL, estimate_tokens
+from prompts import FILE_REVIEW_PROMPT
+
+# Why a budgeted review stopped early
+EXHAUSTED_DEADLINE = "deadline"
+EXHAUSTED_TOKENS = "tokens"
+
+# Reserved per file review on top of the prompt, for the response
+FILE_RESPONSE_TOKENS = 600
+PROMPT_TEMPLATE_TOKENS = estimate_tokens(FILE_REVIEW_PROMPT)
+# Once this share of the time or token budget is spent, files go to the small model
+SMALL_MODEL_PRESSURE = 0.5
+# Assumed per-file review latency until one has been observed
+DEFAULT_FILE_SECONDS = 3.0
+FILE_SECONDS_SMOOTHING = 0.3
+
+# Tests, examples and docs are reviewed last when a budget may not cover everything
+LOW_VALUE_DIRS = {
+    "test", "tests", "__tests__", "spec", "specs", "example", "examples",
+    "fixtures", "mocks", "docs", "scripts", "migrations", "benchmarks"
+}
+LOW_VALUE_NAME = re.compile(r"(^test_|_test\.|\.test\.|\.spec\.|^conftest\.py$)")
+LOW_VALUE_FACTOR = 0.25
+
+
+def file_value(file: Dict[str, Any], max_chars: int) -> float:
+    """
+    Rough value of reviewing a tree entry, from its path and blob size only:
+    more code (up to what is sent to the model) is worth more, and test,
+    example and tooling files are worth less.
+    """
+    value = min(file.get("size") or 0, max_chars) / max_chars
+    parts = file["path"].lower().split("/")
+    if LOW_VALUE_DIRS.intersection(parts[:-1]) or LOW_VALUE_NAME.search(parts[-1]):
+        value *= LOW_VALUE_FACTOR
+    return value
+
+
+def estimate_file_review_tokens(content: str) -> int:
+    return PROMPT_TEMPLATE_TOKENS + estimate_tokens(content) + FILE_RESPONSE_TOKENS
+
+
+class ReviewBudget:
+    """
+    Wall-clock and/or token budget of one review.
+
+    Tokens are read from the review's usage counter (see ai_client.review_usage)
+    plus reservations for calls in flight. A file review is only started if
+    its estimated tokens fit and the deadline leaves time for a typical file
+    review; otherwise the budget records why it was exhausted. With a
+    deadline, concurrency grows with the time the remaining files would take
+    at the observed per-file latency.
+    """
+
+    def __init__(self, usage: Counter, deadline_seconds: Optional[float] = None, token_budget: Optional[int] = None):
+        self.usage = usage
+        self.deadline_seconds = deadline_seconds
+        self.token_budget = token_budget
+        self.started = time.monotonic()
+        self.reserved = 0
+        self.file_seconds = DEFAULT_FILE_SECONDS
+        self.exhausted_by: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.deadline_seconds is None:
+            return None
+        return max(self.deadline_seconds - self.elapsed(), 0.0)
+
+    def tokens_used(self) -> int:
+        return self.usage["tokens"]
+
+    def pressure(self) -> float:
+        """Share of the tighter budget already spent or reserved"""
+        shares = [0.0]
+        if self.deadline_seconds:
+            shares.append(self.elapsed() / self.deadline_seconds)
+        if self.token_budget:
+            shares.append((self.tokens_used() + self.reserved) / self.token_budget)
+        return max(shares)
+
+    def reserve(self, tokens: int) -> bool:
+        """Reserve tokens for a file review; False once the budget cannot cover it"""
+        if self.token_budget is not None and self.tokens_used() + self.reserved + tokens > self.token_budget:
+            self.exhausted_by = EXHAUSTED_TOKENS
+            return False
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining < self.file_seconds:
+            self.exhausted_by = EXHAUSTED_DEADLINE
+            return False
+        self.reserved += tokens
+        return True
+
+    def release(self, tokens: int, seconds: float):
+        """Return a reservation once its review finished, recording how long it took"""
+        self.reserved -= tokens
+        self.file_seconds += FILE_SECONDS_SMOOTHING * (seconds - self.file_seconds)
+
+    def concurrency(self, files_left: int) -> int:
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            return 1
+        needed = files_left * self.file_seconds / max(remaining, 1e-3)
+        return max(1, min(math.ceil(needed), BUDGET_MAX_CONCURRENCY))
+
+    def routing_policy(self) -> Optional[Dict[str, str]]:
+        """Model routing override for file reviews, or None for the default policy"""
+        if self.pressure() >= SMALL_MODEL_PRESSURE:
+            return {STAGE_FILE: TIER_SMALL}
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "token_budget": self.token_budget,
+            "elapsed_seconds": round(self.elapsed(), 2),
+            "tokens_used": self.tokens_used(),
+            "exhausted_by": self.exhausted_by
+        }
@@ -0,0 +1,52 @@
+import redis
+import redis.asyncio
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+from config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Shared synchronous Redis client; connections are opened lazily on first use
+redis_client = redis.Redis.from_url(REDIS_URL)
+
+# Async client of the running worker task. Its connections belong to one event
+# loop, and every Celery task runs its own (asyncio.run), so it is not shared
+task_redis: ContextVar[Optional[redis.asyncio.Redis]] = ContextVar("task_redis", default=None)
+
+
+@asynccontextmanager
+async def async_redis_client():
+    """Scope of one task's async Redis client; it is closed when the task exits"""
+    client = redis.asyncio.Redis.from_url(REDIS_URL)
+    token = task_redis.set(client)
+    try:
+        yield client
+    finally:
+        task_redis.reset(token)
+        await client.aclose()
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    client = task_redis.get()
+    if client is None:
+        raise RuntimeError("The async Redis client is only available inside async_redis_client()")
+    return client
+
+
+def cache_get(key: str) -> Optional[bytes]:
+    """Read a cached value, treating Redis failures as a cache miss"""
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+
+def cache_set(key: str, value: bytes, ttl: int):
+    """Store a value with a TTL in seconds, ignoring Redis failures"""
+    try:
+        redis_client.set(key, value, ex=ttl)
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
@@ -0,0 +1,14 @@
+from cache import redis_client
+
+CANCEL_KEY = "review_cancel:{review_id}"
+# Flags outlive any review run; they only need to be seen once by the worker
+CANCEL_FLAG_TTL = 86400
+
+
+def request_cancellation(review_id: int):
+    """Flag a review for cancellation; raises redis.RedisError if the flag cannot be set"""
+    redis_client.set(CANCEL_KEY.format(review_id=review_id), 1, ex=CANCEL_FLAG_TTL)
+
+
+def is_cancellation_requested(review_id: int) -> bool:
+    return bool(redis_client.exists(CANCEL_KEY.format(review_id=review_id)))
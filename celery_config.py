@@ -1,5 +1,5 @@
 from celery import Celery
-from config import REDIS_URL
+from config import REDIS_URL, WORKER_MAX_MEMORY_MB
 
 celery_app = Celery(
     "git_reviewer",
@@ -14,4 +14,8 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Push pre-reviews run on their own queue so they never delay user-requested reviews
+    task_routes={"tasks.prewarm_review_task": {"queue": "prewarm"}},
+    # Freed memory is rarely returned to the OS; a child that grew past this is replaced after its task (KiB)
+    worker_max_memory_per_child=WORKER_MAX_MEMORY_MB * 1024 or None,
 )
@@ -18,3 +18,61 @@ JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", 24))
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# LLM model routing
+LLM_MODEL_LARGE = os.getenv("LLM_MODEL_LARGE", "llama-3.3-70b-versatile")
+LLM_MODEL_SMALL = os.getenv("LLM_MODEL_SMALL", "llama-3.1-8b-instant")
+# Comma-separated stage=tier pairs, e.g. "structure=large,file=adaptive"; tiers are small, large or adaptive
+MODEL_ROUTING_POLICY = os.getenv("MODEL_ROUTING_POLICY", "")
+SMALL_MODEL_MAX_TOKENS = int(os.getenv("SMALL_MODEL_MAX_TOKENS", 400))
+SMALL_MODEL_MAX_COMPLEXITY = int(os.getenv("SMALL_MODEL_MAX_COMPLEXITY", 6))
+
+# LLM call deadline and request hedging
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", 60))
+# off | duplicate (same model and provider) | fallback (LLM_FALLBACK_MODEL on OpenRouter)
+LLM_HEDGE_MODE = os.getenv("LLM_HEDGE_MODE", "off")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 2.0))
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "meta-llama/llama-3.3-70b-instruct")
+
+# Circuit breakers around GitHub and the LLM provider, shared across workers via Redis
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_FAILURE_WINDOW = int(os.getenv("CIRCUIT_FAILURE_WINDOW", 60))
+CIRCUIT_COOLDOWN = int(os.getenv("CIRCUIT_COOLDOWN", 30))
+
+# Push webhooks that pre-warm reviews for opted-in repositories
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# Pushes to a branch within this many seconds are merged into a single pre-review
+WEBHOOK_DEBOUNCE_SECONDS = int(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", 30))
+# Stored trees and per-blob review results
+REVIEW_STORE_TTL = int(os.getenv("REVIEW_STORE_TTL", 7 * 24 * 3600))
+# Budgeted reviews (deadline_seconds / token_budget): file reviews run in
+# parallel up to this limit when the deadline requires it, and the file limit
+# is raised so generous budgets can review exhaustively
+BUDGET_MAX_CONCURRENCY = int(os.getenv("BUDGET_MAX_CONCURRENCY", 4))
+BUDGET_MAX_FILES = int(os.getenv("BUDGET_MAX_FILES", 200))
+# Files at least this similar (estimated Jaccard over token shingles) to one
+# already reviewed in the same run reuse its review; 0 disables
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.85))
+
+# Large repositories: trees with more blobs than this are reviewed in
+# streaming mode (no full path list in results); the per-task cap on RSS growth
+# stops a review early with partial results, 0 disables it; worker processes are
+# replaced after a task once their RSS exceeds WORKER_MAX_MEMORY_MB (0 disables)
+STREAMING_TREE_ENTRIES = int(os.getenv("STREAMING_TREE_ENTRIES", 20000))
+REVIEW_MAX_RSS_MB = int(os.getenv("REVIEW_MAX_RSS_MB", 1024))
+WORKER_MAX_MEMORY_MB = int(os.getenv("WORKER_MAX_MEMORY_MB", 1536))
+
+# Repository listing cache: fresh entries are served directly, stale ones are
+# served while revalidating in the background until they expire
+REPO_LIST_FRESH_SECONDS = int(os.getenv("REPO_LIST_FRESH_SECONDS", 60))
+REPO_LIST_MAX_STALE_SECONDS = int(os.getenv("REPO_LIST_MAX_STALE_SECONDS", 24 * 3600))
+
+# Review progress: database writes are coalesced to one per interval or step
+# (percentage points); transient socket events are throttled to one per interval
+PROGRESS_WRITE_INTERVAL = float(os.getenv("PROGRESS_WRITE_INTERVAL", 2.0))
+PROGRESS_WRITE_STEP = int(os.getenv("PROGRESS_WRITE_STEP", 10))
+PROGRESS_EMIT_INTERVAL = float(os.getenv("PROGRESS_EMIT_INTERVAL", 0.5))
+# pickle (python-socketio default) | compact (orjson, zlib above the size threshold); same value on every process
+SOCKET_SERIALIZER = os.getenv("SOCKET_SERIALIZER", "pickle")
+SOCKET_COMPRESS_MIN_BYTES = int(os.getenv("SOCKET_COMPRESS_MIN_BYTES", 1024))
@@ -0,0 +1,193 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Pattern, Tuple
+from path_matcher import compile_pattern
+
+# Classification actions
+ACTION_REVIEW = "review"
+ACTION_SKIP = "skip"
+ACTION_DOWNGRADE = "downgrade"
+
+# Generators put their banner in the comment block a file opens with or in its
+# first lines; markers further down are ordinary comments ("x.py is auto-generated")
+HEADER_SCAN_LENGTH = 2048
+HEADER_SCAN_LINES = 3
+LINE_COMMENT_PREFIXES = ("#", "//", "--", ";", "%", "*", "<!--", "/*", '"""', "'''")
+BLOCK_COMMENTS = (("/*", "*/"), ("<!--", "-->"), ('"""', '"""'), ("'''", "'''"))
+
+GENERATED_MARKERS = (
+    "@generated",
+    "do not edit",
+    "code generated by",
+    "autogenerated",
+    "auto-generated",
+    "automatically generated",
+    "generated by the protocol buffer compiler",
+    "generated by openapi generator",
+    "generated by swagger codegen",
+)
+
+GENERATED_NAME_SUFFIXES = (
+    '.min.js', '.min.mjs', '.min.css', '.bundle.js', '.chunk.js',
+    '_pb2.py', '_pb2_grpc.py', '.pb.go', '.pb.cc', '.pb.h',
+    '.pb.ts', '_pb.js', '_grpc_pb.js', '.g.dart', '.freezed.dart',
+    '.designer.cs', '.generated.cs', '.generated.ts', '.generated.js',
+)
+
+GENERATED_NAMES = ('.pnp.js', '.pnp.cjs', '.pnp.loader.mjs')
+
+# Content heuristics
+MINIFIED_AVG_LINE_LENGTH = 250
+MINIFIED_MAX_LINE_LENGTH = 2000
+MINIFIED_MAX_LINES = 20
+HIGH_ENTROPY_THRESHOLD = 5.8
+BINARY_CONTROL_RATIO = 0.05
+ENTROPY_SAMPLE_LENGTH = 20000
+
+# Large, literal-heavy files are likely fixtures and are only reviewed on their head
+FIXTURE_MIN_LENGTH = 20000
+FIXTURE_LITERAL_RATIO = 0.6
+LITERAL_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|\b(?:true|false|null|None|True|False)\b')
+LITERAL_LINE_CHARS = frozenset("[]{}(),:;=- \t0123456789.+eE")
+
+CONTROL_CHARS = frozenset(chr(c) for c in range(32) if chr(c) not in "\t\n\r\f")
+
+LINGUIST_ATTRIBUTES = ("linguist-generated", "linguist-vendored")
+
+
+def parse_gitattributes(content: str) -> List[Tuple[Pattern, Dict[str, bool]]]:
+    """Parse linguist hints from a .gitattributes file into (compiled pattern, attributes) rules"""
+    rules = []
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        parts = line.split()
+        pattern, attributes = parts[0], {}
+
+        for attr in parts[1:]:
+            if attr.startswith(("-", "!")):
+                name, value = attr[1:], False
+            elif "=" in attr:
+                name, _, raw_value = attr.partition("=")
+                value = raw_value.lower() not in ("false", "0")
+            else:
+                name, value = attr, True
+
+            if name in LINGUIST_ATTRIBUTES:
+                attributes[name] = value
+
+        regex = compile_pattern(pattern)
+        if attributes and regex is not None:
+            rules.append((regex, attributes))
+
+    return rules
+
+
+def gitattributes_reason(path: str, rules: List[Tuple[Pattern, Dict[str, bool]]]) -> Optional[str]:
+    """Return the linguist attribute marking a path as generated or vendored, if any"""
+    resolved = {}
+
+    # Later rules override earlier ones, as in git
+    for regex, attributes in rules:
+        if regex.match(path):
+            resolved.update(attributes)
+
+    for name in LINGUIST_ATTRIBUTES:
+        if resolved.get(name):
+            return name
+    return None
+
+
+def classify_path(path: str, gitattributes: Optional[List[Tuple[Pattern, Dict[str, bool]]]] = None) -> Optional[str]:
+    """Classify a file from its path alone, returning a skip reason or None"""
+    if gitattributes:
+        reason = gitattributes_reason(path, gitattributes)
+        if reason:
+            return reason
+
+    name = path.rsplit("/", 1)[-1].lower()
+    if name in GENERATED_NAMES or name.endswith(GENERATED_NAME_SUFFIXES):
+        return "generated_name"
+
+    return None
+
+
+def _is_literal_line(line: str) -> bool:
+    return set(LITERAL_TOKEN_PATTERN.sub("", line)) <= LITERAL_LINE_CHARS
+
+
+def shannon_entropy(text: str) -> float:
+    """Shannon entropy of a string in bits per character"""
+    if not text:
+        return 0.0
+
+    length = len(text)
+    return -sum((count / length) * math.log2(count / length) for count in Counter(text).values())
+
+
+def _header(content: str) -> str:
+    """The file's first lines and its leading comment block, lowercased"""
+    header = []
+    block_end = None
+    code_seen = False
+    for index, line in enumerate(content[:HEADER_SCAN_LENGTH].splitlines()):
+        stripped = line.strip()
+        if block_end:
+            header.append(line)
+            if block_end in stripped:
+                block_end = None
+            continue
+
+        is_comment = not stripped or stripped.startswith(LINE_COMMENT_PREFIXES)
+        code_seen = code_seen or not is_comment
+        if index >= HEADER_SCAN_LINES and code_seen:
+            break
+        header.append(line)
+
+        for opener, closer in BLOCK_COMMENTS:
+            if stripped.startswith(opener) and closer not in stripped[len(opener):]:
+                block_end = closer
+                break
+    return "\n".join(header).lower()
+
+
+def classify_content(path: str, content: str) -> Tuple[str, Optional[str]]:
+    """
+    Classify fetched file content before it is sent to the model.
+    Returns an (action, reason) tuple where action is review, skip or downgrade.
+    """
+    if not content.strip():
+        return ACTION_SKIP, "empty"
+
+    sample = content[:ENTROPY_SAMPLE_LENGTH]
+    control = sum(1 for char in sample if char in CONTROL_CHARS)
+    if control / len(sample) > BINARY_CONTROL_RATIO:
+        return ACTION_SKIP, "binary"
+
+    header = _header(content)
+    if any(marker in header for marker in GENERATED_MARKERS):
+        return ACTION_SKIP, "generated_header"
+
+    lines = content.splitlines()
+    line_lengths = [len(line) for line in lines]
+    if line_lengths:
+        avg_line_length = sum(line_lengths) / len(line_lengths)
+        if avg_line_length > MINIFIED_AVG_LINE_LENGTH or (
+            max(line_lengths) > MINIFIED_MAX_LINE_LENGTH and len(lines) <= MINIFIED_MAX_LINES
+        ):
+            return ACTION_SKIP, "minified"
+
+    if shannon_entropy(sample) > HIGH_ENTROPY_THRESHOLD:
+        return ACTION_SKIP, "high_entropy"
+
+    if len(content) >= FIXTURE_MIN_LENGTH:
+        non_blank = [line for line in lines if line.strip()]
+        literal = sum(1 for line in non_blank if _is_literal_line(line))
+        if non_blank and literal / len(non_blank) >= FIXTURE_LITERAL_RATIO:
+            return ACTION_DOWNGRADE, "data_fixture"
+
+    return ACTION_REVIEW, None
@@ -2,12 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from database import engine, Base
 from routes.auth import router as auth_router
 from routes.github import router as github_router
 from routes.user import router as user_router
 from routes.review import router as review_router
+from routes.webhook import router as webhook_router
 from socket_manager import socket_app
+from repo_listing import close_http_client
 from error_handler import (
     AppException,
     app_exception_handler,
@@ -16,8 +17,7 @@ from error_handler import (
     general_exception_handler
 )
 
-Base.metadata.create_all(bind=engine)
-
+# Tables are managed by the explicit migration step (python migrate.py), not at startup
 app = FastAPI(title="AI Git Reviewer")
 
 app.add_exception_handler(AppException, app_exception_handler)
@@ -37,9 +37,14 @@ app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(github_router, prefix="/api/github", tags=["github"])
 app.include_router(user_router, prefix="/api/user", tags=["user"])
 app.include_router(review_router, prefix="/api/review", tags=["review"])
+app.include_router(webhook_router, prefix="/api/webhooks", tags=["webhooks"])
 
 app.mount("/socket.io", socket_app)
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_client()
+
 @app.get("/")
 def root():
     return {"message": "AI Git Reviewer API"}
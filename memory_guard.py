@@ -0,0 +1,96 @@
+import gc
+import logging
+import os
+import re
+import resource
+import sys
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+PEAK_PATTERN = re.compile(r"VmHWM:\s+(\d+) kB")
+# Above this share of the limit a review trades speed for memory
+SOFT_LIMIT_RATIO = 0.8
+MB = 1024 * 1024
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # No procfs (e.g. macOS): the lifetime peak is the closest figure available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter so it covers only what runs next; False where unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def kernel_peak_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status:
+            match = PEAK_PATTERN.search(status.read())
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 if match else None
+
+
+class MemoryGuard:
+    """
+    Resident memory of one review task. Celery's prefork workers run one
+    task per process at a time, so RSS growth since the guard was created is
+    the task's; what earlier tasks left in the process does not count.
+    check() samples it: above the soft limit the guard is constrained
+    (callers shrink prefetch and concurrency to one blob) and a collection is
+    run; at the limit it is exceeded and the review stops with what it has.
+    A limit of 0 only measures.
+    """
+
+    def __init__(self, limit_mb: int = 0):
+        self.limit = limit_mb * MB or None
+        self.soft_limit = self.limit * SOFT_LIMIT_RATIO if self.limit else None
+        self.constrained = False
+        self.exceeded = False
+        self._kernel_peak = reset_peak_rss()
+        self.start_rss = self.peak = current_rss_bytes()
+
+    def check(self) -> bool:
+        """Sample RSS; True once the task's growth has reached the limit"""
+        rss = current_rss_bytes()
+        self.peak = max(self.peak, rss)
+        if self.soft_limit and rss - self.start_rss >= self.soft_limit and not self.constrained:
+            self.constrained = True
+            gc.collect()
+            rss = current_rss_bytes()
+            logger.warning(
+                f"Review memory grew by {(rss - self.start_rss) / MB:.0f} MB of {self.limit / MB:.0f} MB, "
+                f"prefetching one blob at a time"
+            )
+        if self.limit and rss - self.start_rss >= self.limit:
+            self.exceeded = True
+        return self.exceeded
+
+    def peak_bytes(self) -> int:
+        if self._kernel_peak:
+            # Includes allocations between samples
+            return max(self.peak, kernel_peak_rss_bytes() or 0)
+        return self.peak
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rss_start_mb": round(self.start_rss / MB, 1),
+            "rss_end_mb": round(current_rss_bytes() / MB, 1),
+            "peak_rss_mb": round(self.peak_bytes() / MB, 1),
+            "rss_limit_mb": round(self.limit / MB) if self.limit else None,
+            "memory_exceeded": self.exceeded
+        }
@@ -0,0 +1,71 @@
+"""
+Explicit schema migration step, run once per deploy before starting API
+servers or workers:
+
+    python migrate.py
+
+Creates missing tables and indexes, adds nullable columns that were added
+to models.py after a table was created and backfills derived tables.
+Anything else (type changes, renames, NOT NULL columns on existing tables)
+is reported and must be migrated by hand.
+"""
+import logging
+import sys
+from sqlalchemy import inspect, text
+from database import engine, Base, SessionLocal
+import models
+from analytics import backfill_review_issues
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate")
+
+
+def add_missing_columns(connection, table) -> int:
+    """Add model columns missing from an existing table; returns how many could not be added"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    unsupported = 0
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+
+        if not column.nullable and column.server_default is None:
+            logger.error(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+            unsupported += 1
+            continue
+
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        logger.info(f"Added column {table.name}.{column.name} ({column_type})")
+
+    return unsupported
+
+
+def migrate() -> int:
+    with engine.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+        unsupported = 0
+
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(connection)
+                logger.info(f"Created table {table.name}")
+                continue
+
+            unsupported += add_missing_columns(connection, table)
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+    # Data migrations for tables derived from existing rows
+    if models.IssueRecord.__tablename__ not in existing_tables:
+        db = SessionLocal()
+        try:
+            logger.info(f"Indexed issues of {backfill_review_issues(db)} completed reviews")
+        finally:
+            db.close()
+
+    return 1 if unsupported else 0
+
+
+if __name__ == "__main__":
+    sys.exit(migrate())
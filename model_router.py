@@ -0,0 +1,111 @@
+import re
+import logging
+from typing import Dict, Any, Optional
+from config import (
+    LLM_MODEL_LARGE,
+    LLM_MODEL_SMALL,
+    MODEL_ROUTING_POLICY,
+    SMALL_MODEL_MAX_TOKENS,
+    SMALL_MODEL_MAX_COMPLEXITY
+)
+from tree_summary import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+TIER_ADAPTIVE = "adaptive"
+
+MODELS = {
+    TIER_SMALL: LLM_MODEL_SMALL,
+    TIER_LARGE: LLM_MODEL_LARGE,
+}
+
+# Review stages and their default tier
+STAGE_STRUCTURE = "structure"
+STAGE_FILE = "file"
+DEFAULT_POLICY = {
+    STAGE_STRUCTURE: TIER_LARGE,
+    STAGE_FILE: TIER_ADAPTIVE,
+}
+
+# Cheap control-flow signals shared by most supported languages
+BRANCH_PATTERN = re.compile(r'\b(?:if|elif|else if|for|foreach|while|case|catch|except|switch|match)\b|&&|\|\||\?\?')
+FUNCTION_PATTERN = re.compile(r'\b(?:def|function|func|fn|fun|class|interface|struct|impl)\b|=>')
+INDENT_UNIT = 4
+
+
+def parse_policy(raw: str) -> Dict[str, str]:
+    """Parse a "stage=tier,..." override string on top of the default policy"""
+    policy = dict(DEFAULT_POLICY)
+    for entry in raw.split(","):
+        stage, _, tier = entry.strip().partition("=")
+        stage, tier = stage.strip(), tier.strip()
+        if not stage:
+            continue
+        if tier not in (TIER_SMALL, TIER_LARGE, TIER_ADAPTIVE):
+            logger.warning(f"Ignoring invalid model routing policy entry: {entry}")
+            continue
+        policy[stage] = tier
+    return policy
+
+
+ROUTING_POLICY = parse_policy(MODEL_ROUTING_POLICY)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count from string length"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def estimate_complexity(content: str) -> int:
+    """
+    Cheap complexity score from branch keywords, function definitions and
+    maximum indentation depth. Not a real cyclomatic complexity, but enough
+    to tell a constants module from a service module.
+    """
+    branches = len(BRANCH_PATTERN.findall(content))
+    functions = len(FUNCTION_PATTERN.findall(content))
+
+    max_indent = 0
+    for line in content.splitlines():
+        expanded = line.expandtabs(INDENT_UNIT)
+        stripped = expanded.lstrip()
+        if stripped:
+            max_indent = max(max_indent, len(expanded) - len(stripped))
+
+    return branches + functions // 2 + max_indent // INDENT_UNIT
+
+
+def route_model(stage: str, content: str, policy: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Pick a model for one LLM call. Returns the routing decision, which callers
+    record alongside the result.
+    """
+    policy = policy or ROUTING_POLICY
+    tier = policy.get(stage, TIER_LARGE)
+    tokens = estimate_tokens(content)
+    complexity = None
+
+    if tier == TIER_ADAPTIVE:
+        if tokens > SMALL_MODEL_MAX_TOKENS:
+            tier, reason = TIER_LARGE, "tokens"
+        else:
+            complexity = estimate_complexity(content)
+            if complexity > SMALL_MODEL_MAX_COMPLEXITY:
+                tier, reason = TIER_LARGE, "complexity"
+            else:
+                tier, reason = TIER_SMALL, "trivial"
+    else:
+        reason = "policy"
+
+    decision = {
+        "stage": stage,
+        "tier": tier,
+        "model": MODELS[tier],
+        "reason": reason,
+        "estimated_tokens": tokens,
+        "complexity": complexity
+    }
+    logger.info(f"Model routing: {decision}")
+    return decision
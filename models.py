@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -16,6 +16,7 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     reviews = relationship("Review", back_populates="user")
+    watched_repositories = relationship("WatchedRepository", back_populates="user")
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -25,8 +26,41 @@ class Review(Base):
     repo_url = Column(String, index=True)
     commit_hash = Column(String)
     status = Column(String, default="pending")
+    task_id = Column(String)
     progress = Column(Integer, default=0)
     review_content = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="reviews")
+
+class WatchedRepository(Base):
+    """Repository a user opted in to push-webhook pre-reviews"""
+    __tablename__ = "watched_repositories"
+    __table_args__ = (UniqueConstraint("user_id", "full_name"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Lowercased owner/name, as matched against webhook payloads
+    full_name = Column(String, index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship("User", back_populates="watched_repositories")
+
+class IssueRecord(Base):
+    """One issue from a completed review, denormalized for analytics queries"""
+    __tablename__ = "review_issues"
+    __table_args__ = (
+        Index("ix_review_issues_user_time", "user_id", "reviewed_at"),
+        Index("ix_review_issues_user_repo_time", "user_id", "repo_url", "reviewed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    review_id = Column(Integer, ForeignKey("reviews.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    repo_url = Column(String, nullable=False)
+    # None for repository structure issues
+    filename = Column(String)
+    severity = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    reviewed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,139 @@
+import copy
+import random
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+# Token shingles: robust to whitespace and formatting differences between copies
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Fixed seed: signatures must be comparable across processes and runs
+_rng = random.Random(0x5EED)
+PERMUTATIONS = tuple(
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+)
+
+CONFIDENCE_HIGH = "high"
+CONFIDENCE_LOW = "low"
+# Above this share of lines that differ from the representative, issues in the new code may be missed
+MAX_CHANGED_LINE_RATIO = 0.1
+
+
+def shingle_hashes(content: str) -> set:
+    """32-bit hashes of the token k-shingles of a file"""
+    tokens = TOKEN_PATTERN.findall(content)
+    if len(tokens) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(content: str) -> Tuple[int, ...]:
+    """MinHash signature of a file's shingle set"""
+    hashes = shingle_hashes(content)
+    return tuple(
+        min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+        for a, b in PERMUTATIONS
+    )
+
+
+def estimate_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class NearDuplicateIndex:
+    """
+    Representatives reviewed so far in one review run. Files are assigned to
+    the most similar representative at or above the threshold; a file with
+    no match becomes a representative itself once it has been reviewed.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._representatives: List[Tuple[Tuple[int, ...], str, Dict[str, Any]]] = []
+
+    def find(self, signature: Tuple[int, ...]) -> Optional[Tuple[str, Dict[str, Any], float]]:
+        """Return (representative content, review, similarity) for the closest match, if any"""
+        best = None
+        for rep_signature, rep_content, rep_review in self._representatives:
+            similarity = estimate_similarity(signature, rep_signature)
+            if similarity >= self.threshold and (best is None or similarity > best[2]):
+                best = (rep_content, rep_review, similarity)
+        return best
+
+    def add(self, signature: Tuple[int, ...], content: str, file_review: Dict[str, Any]):
+        self._representatives.append((signature, content, file_review))
+
+
+def _line_mapping(source: str, target: str):
+    """
+    Map each source line index to (target line index, unchanged). Also
+    returns the target's line count and how many of its lines differ.
+    """
+    source_lines = source.splitlines()
+    target_lines = target.splitlines()
+    mapping = {}
+    changed = 0
+
+    matcher = SequenceMatcher(None, source_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed += j2 - j1
+        for offset, i in enumerate(range(i1, i2)):
+            if tag == "equal":
+                mapping[i] = (j1 + offset, True)
+            else:
+                # Replaced lines point at the nearest line of the changed region; deleted
+                # lines have none in the target, so they point at the line before it
+                nearest = min(j1 + offset, j2 - 1) if j2 > j1 else j1 - 1
+                mapping[i] = (min(max(nearest, 0), max(len(target_lines) - 1, 0)), False)
+
+    return mapping, len(target_lines), changed
+
+
+def project_review(
+    file_review: Dict[str, Any],
+    source_content: str,
+    target_content: str,
+    target_path: str,
+    similarity: float
+) -> Dict[str, Any]:
+    """
+    Project a representative's review onto a near-duplicate file. Issue lines
+    are moved through a line diff of the two files. Issues on lines that
+    differ are kept but flagged low confidence; the file result is low
+    confidence if any issue was flagged or too much of the file differs.
+    """
+    projected = copy.deepcopy(file_review)
+    projected.pop("repaired", None)
+    mapping, target_length, changed = _line_mapping(source_content, target_content)
+
+    confidence = CONFIDENCE_HIGH
+    if target_length and changed / target_length > MAX_CHANGED_LINE_RATIO:
+        confidence = CONFIDENCE_LOW
+    for issue in projected.get("issues", []):
+        line = issue.get("line")
+        if not isinstance(line, int) or line < 1:
+            continue
+
+        target_line, unchanged = mapping.get(line - 1, (min(line - 1, max(target_length - 1, 0)), False))
+        issue["line"] = target_line + 1
+        if not unchanged:
+            issue["confidence"] = CONFIDENCE_LOW
+            confidence = CONFIDENCE_LOW
+
+    projected["filename"] = target_path
+    projected["projected_from"] = file_review.get("filename")
+    projected["similarity"] = round(similarity, 3)
+    projected["changed_lines"] = changed
+    projected["confidence"] = confidence
+    return projected
@@ -0,0 +1,290 @@
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Patterns that are never worth reviewing, in gitignore syntax
+DEFAULT_EXCLUDE_PATTERNS = (
+    "node_modules/",
+    "venv/",
+    ".venv/",
+    ".git/",
+    "dist/",
+    "build/",
+    "__pycache__/",
+)
+
+# Alternations are split into chunks to stay well below the regex engine's group limits
+MAX_PATTERNS_PER_REGEX = 200
+
+GLOB_CHARS = frozenset("*?[\\")
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate the glob body of a pattern into regex source, without anchoring"""
+    parts = []
+    i, length = 0, len(pattern)
+    while i < length:
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == length:
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+        elif char == "\\" and i + 1 < length:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return "".join(parts)
+
+
+def _split_pattern(pattern: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Normalize a pattern into (glob, anchored, directory_only). Comments
+    are dropped by the callers, before escapes such as "\\#" are removed.
+    Returns None for blank patterns.
+    """
+    if not pattern:
+        return None
+
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+
+    # "**/name" is equivalent to the cheaper basename form "name"
+    if pattern.startswith("**/") and "/" not in pattern[3:]:
+        pattern = pattern[3:]
+
+    if not pattern:
+        return None
+
+    # Patterns containing a slash are anchored to the repository root
+    anchored = "/" in pattern
+    return pattern.lstrip("/"), anchored, directory_only
+
+
+def _split_contents_pattern(glob: str, anchored: bool) -> Optional[Tuple[str, bool]]:
+    """
+    For "base/**" patterns, which match everything strictly inside a directory,
+    return (base glob, anchored). Returns None for other patterns.
+    """
+    if not anchored or not glob.endswith("/**"):
+        return None
+
+    base = glob[:-3]
+    if base.startswith("**/") and "/" not in base[3:]:
+        return base[3:], False
+    if not base or "**" in base:
+        return None
+    return base, True
+
+
+def translate_pattern(pattern: str) -> Optional[str]:
+    """
+    Translate a single gitignore-style pattern into a regex source string
+    matching full paths. Negation is handled by the caller.
+    """
+    if pattern.startswith("#"):
+        return None
+    split = _split_pattern(pattern)
+    if split is None:
+        return None
+
+    glob, anchored, directory_only = split
+    prefix = "" if anchored else "(?:.*/)?"
+    # A directory pattern only matches paths inside it; others also match as a parent directory
+    suffix = "/.*" if directory_only else "(?:/.*)?"
+    return prefix + _translate_glob(glob) + suffix
+
+
+def compile_pattern(pattern: str) -> Optional[Pattern]:
+    """Compile a single gitignore-style pattern"""
+    source = translate_pattern(pattern)
+    return re.compile(source + r"\Z") if source is not None else None
+
+
+def _compile_alternation(sources: List[str]) -> List[Pattern]:
+    return [
+        re.compile("(?:" + "|".join(sources[i:i + MAX_PATTERNS_PER_REGEX]) + r")\Z")
+        for i in range(0, len(sources), MAX_PATTERNS_PER_REGEX)
+    ]
+
+
+def _build_check(name_globs: List[str], path_globs: List[str]) -> tuple:
+    """
+    Compile one kind of glob within a group. Literal names and "*suffix" globs,
+    by far the most common ignore lines, use set lookups and str.endswith
+    instead of regexes.
+    """
+    literals, suffixes, name_sources = set(), [], []
+    for glob in name_globs:
+        if not GLOB_CHARS.intersection(glob):
+            literals.add(glob)
+        elif glob.startswith("*") and not GLOB_CHARS.intersection(glob[1:]):
+            suffixes.append(glob[1:])
+        else:
+            name_sources.append(_translate_glob(glob))
+
+    return (
+        frozenset(literals),
+        tuple(suffixes),
+        _compile_alternation(name_sources),
+        _compile_alternation([_translate_glob(glob) for glob in path_globs])
+    )
+
+
+def _check_matches(check: tuple, path: str, name: str) -> bool:
+    literals, suffixes, name_regexes, path_regexes = check
+    if name in literals or (suffixes and name.endswith(suffixes)):
+        return True
+    for regex in name_regexes:
+        if regex.match(name):
+            return True
+    for regex in path_regexes:
+        if regex.match(path):
+            return True
+    return False
+
+
+class PathMatcher:
+    """
+    Matches paths against an ordered list of gitignore-style patterns.
+
+    Patterns without a slash are matched against a single path component and
+    anchored patterns against the full path; consecutive patterns of the same
+    polarity are compiled together. Every directory is evaluated once and
+    memoized, including whether it lies inside a "dir/**" pattern, so files
+    only pay for their own basename checks. As in git, nothing inside an
+    excluded directory can be re-included, and the last matching pattern decides.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # Each group is (negated, {kind: [globs]})
+        groups: List[Tuple[bool, Dict[str, List[str]]]] = []
+
+        for raw in patterns:
+            pattern = raw.strip()
+            if pattern.startswith("#"):
+                continue
+            negated = pattern.startswith("!")
+            if negated:
+                pattern = pattern[1:]
+            elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+                pattern = pattern[1:]
+
+            split = _split_pattern(pattern)
+            if split is None:
+                continue
+
+            glob, anchored, directory_only = split
+            contents = None if directory_only else _split_contents_pattern(glob, anchored)
+            if contents:
+                glob, anchored = contents
+                kind = "contents_path" if anchored else "contents_name"
+            else:
+                kind = ("path" if anchored else "name") + ("_dir" if directory_only else "")
+
+            if not groups or groups[-1][0] != negated:
+                groups.append((negated, {}))
+            groups[-1][1].setdefault(kind, []).append(glob)
+
+        # Evaluation order is last group first
+        self._negated = []
+        self._file_checks = []
+        self._directory_checks = []
+        self._contents_checks = []
+        for negated, globs in reversed(groups):
+            name_any, path_any = globs.get("name", []), globs.get("path", [])
+            self._negated.append(negated)
+            self._file_checks.append(_build_check(name_any, path_any))
+            self._directory_checks.append(_build_check(
+                name_any + globs.get("name_dir", []),
+                path_any + globs.get("path_dir", [])
+            ))
+            self._contents_checks.append(
+                _build_check(globs.get("contents_name", []), globs.get("contents_path", []))
+                if "contents_name" in globs or "contents_path" in globs else None
+            )
+
+        self._has_file_checks = [any(check) for check in self._file_checks]
+        # directory -> (excluded, per-group "inside a dir/** pattern" flags,
+        #               file checks that can still decide, fallback decision for files)
+        self._directories: Dict[str, tuple] = {}
+        self._root = self._directory_info(False, (False,) * len(self._negated))
+        self._directories[""] = self._root
+
+    def __bool__(self) -> bool:
+        return bool(self._negated)
+
+    def _evaluate(self, checks: list, inside: Tuple[bool, ...], path: str, name: str) -> bool:
+        for index, check in enumerate(checks):
+            if inside[index] or _check_matches(check, path, name):
+                return not self._negated[index]
+        return False
+
+    def _directory_info(self, excluded: bool, inside: Tuple[bool, ...]) -> tuple:
+        # Only groups ahead of the first containing "dir/**" pattern can change a file's outcome
+        file_checks, file_default = [], False
+        for index, negated in enumerate(self._negated):
+            if inside[index]:
+                file_default = not negated
+                break
+            if self._has_file_checks[index]:
+                file_checks.append((negated, self._file_checks[index]))
+        return excluded, inside, file_checks, file_default
+
+    def _directory(self, directory: str) -> tuple:
+        info = self._directories.get(directory)
+        if info is None:
+            parent, _, name = directory.rpartition("/")
+            parent_excluded, parent_inside, _, _ = self._directory(parent)
+
+            excluded = parent_excluded or self._evaluate(self._directory_checks, parent_inside, directory, name)
+
+            # Children of this directory are inside a "base/**" pattern if it matches base
+            inside = tuple(
+                parent_inside[index] or (check is not None and _check_matches(check, directory, name))
+                for index, check in enumerate(self._contents_checks)
+            )
+
+            info = self._directory_info(excluded, inside)
+            self._directories[directory] = info
+        return info
+
+    def matches(self, path: str) -> bool:
+        directory, _, name = path.rpartition("/")
+        info = self._directories.get(directory)
+        if info is None:
+            info = self._directory(directory)
+        excluded, _, file_checks, file_default = info
+        if excluded:
+            return True
+        for negated, check in file_checks:
+            if _check_matches(check, path, name):
+                return not negated
+        return file_default
+
+
+def parse_ignore_file(content: str) -> List[str]:
+    """Split an ignore file into its pattern lines"""
+    return [line for line in content.splitlines() if line.strip() and not line.startswith("#")]
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+
+class StageGraph:
+    """
+    A small dependency graph of async stages. Every stage starts as soon as
+    the stages it runs after have finished and is called with their results,
+    in order, so independent stages overlap. If a stage fails the others are
+    cancelled and its exception is raised from run(); cancelling run()
+    cancels every stage.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], after: Iterable[str] = ()):
+        after = tuple(after)
+        unknown = [dependency for dependency in after if dependency not in self._stages]
+        if unknown:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+        self._stages[name] = (func, after)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns their results by name"""
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, after = self._stages[name]
+            results = [await tasks[dependency] for dependency in after]
+            return await func(*results)
+
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name), name=name)
+
+        try:
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+            return {name: task.result() for name, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
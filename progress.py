@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from models import Review
+from config import PROGRESS_WRITE_INTERVAL, PROGRESS_WRITE_STEP, PROGRESS_EMIT_INTERVAL
+
+
+class ProgressReporter:
+    """
+    Coalesces progress for one running review.
+
+    Progress and partial results are written to the database only when
+    PROGRESS_WRITE_INTERVAL seconds have passed or progress moved by
+    PROGRESS_WRITE_STEP points since the last write, or when forced at stage
+    boundaries. Transient socket events (the file being reviewed, skipped
+    files) are throttled to one per PROGRESS_EMIT_INTERVAL, with skips
+    batched in between. Per-file results are never dropped.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        review: Review,
+        write_interval: float = PROGRESS_WRITE_INTERVAL,
+        write_step: int = PROGRESS_WRITE_STEP,
+        emit_interval: float = PROGRESS_EMIT_INTERVAL
+    ):
+        self.db = db
+        self.review = review
+        self.write_interval = write_interval
+        self.write_step = write_step
+        self.emit_interval = emit_interval
+        self.writes = 0
+
+        self._written_progress = review.progress or 0
+        self._last_write = time.monotonic()
+        self._last_emit = float("-inf")
+        self._content: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._skipped: List[Dict[str, str]] = []
+
+    def update(self, progress: int, content: Optional[Dict[str, Any]] = None, force: bool = False):
+        """Record progress and, optionally, the latest partial results"""
+        self.review.progress = progress
+        if content is not None:
+            self._content = content
+        self._dirty = True
+
+        if (
+            force
+            or progress - self._written_progress >= self.write_step
+            or time.monotonic() - self._last_write >= self.write_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write pending progress and partial results"""
+        if not self._dirty:
+            return
+        if self._content is not None:
+            self.review.review_content = json.dumps(self._content)
+            self._content = None
+        self.db.commit()
+
+        self.writes += 1
+        self._dirty = False
+        self._written_progress = self.review.progress or 0
+        self._last_write = time.monotonic()
+
+    def discard(self):
+        """Drop pending progress and results; for callers about to write the final state themselves"""
+        self._content = None
+        self._dirty = False
+
+    def emit_due(self) -> bool:
+        """Whether a transient event may be emitted now; claims the slot if so"""
+        now = time.monotonic()
+        if now - self._last_emit < self.emit_interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def add_skipped(self, filename: str, reason: str):
+        self._skipped.append({"filename": filename, "reason": reason})
+
+    def take_skipped(self, force: bool = False) -> List[Dict[str, str]]:
+        """Return the skips batched so far, once an emit is due or when forced"""
+        if not self._skipped or not (force or self.emit_due()):
+            return []
+        skipped, self._skipped = self._skipped, []
+        return skipped
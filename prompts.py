@@ -27,7 +27,7 @@ Content:
 Analyze for:
 1. Code quality and best practices
 2. Grammar and naming conventions
-3. Security vulnerabilities (API keys, secrets, etc.)
+3. Security vulnerabilities (injection, unsafe input handling, etc.; committed secrets are detected separately)
 4. Potential bugs
 5. Performance issues
 
@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+from typing import Any, Dict, List, Optional, Tuple
+from cache import redis_client
+from config import GITHUB_WEBHOOK_SECRET, WEBHOOK_DEBOUNCE_SECONDS
+
+PUSH_KEY = "webhook_push:{repo}:{branch}"
+
+# The all-zero sha marks a deleted branch
+NULL_SHA = "0" * 40
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str] = GITHUB_WEBHOOK_SECRET) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body"""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def parse_push(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Extract what a pre-review needs from a push payload. Returns None for
+    pushes that cannot affect a review: tags, deleted branches and branches
+    other than the default one, which is the only branch reviews read.
+    """
+    repository = payload.get("repository") or {}
+    ref = payload.get("ref") or ""
+    head = payload.get("after")
+
+    if not ref.startswith("refs/heads/") or payload.get("deleted") or not head or head == NULL_SHA:
+        return None
+
+    branch = ref[len("refs/heads/"):]
+    if branch != repository.get("default_branch"):
+        return None
+
+    paths = set()
+    for commit in payload.get("commits") or []:
+        for field in ("added", "modified"):
+            paths.update(commit.get(field) or [])
+
+    return {
+        "full_name": repository.get("full_name", "").lower(),
+        "branch": branch,
+        "head": head,
+        "paths": sorted(paths)
+    }
+
+
+def record_push(full_name: str, branch: str, head: str, paths: List[str]) -> bool:
+    """
+    Merge a push into the pending state for its branch. Returns True for the
+    first push of a burst, which is the one that schedules the pre-review.
+    """
+    key = PUSH_KEY.format(repo=full_name, branch=branch)
+    # Outlives the debounce window, so a lost task cannot block pre-reviews for long
+    ttl = WEBHOOK_DEBOUNCE_SECONDS * 10
+
+    pipe = redis_client.pipeline()
+    pipe.hset(key, "head", head)
+    if paths:
+        pipe.sadd(f"{key}:paths", *paths)
+    pipe.expire(key, ttl)
+    pipe.expire(f"{key}:paths", ttl)
+    pipe.set(f"{key}:scheduled", 1, nx=True, ex=ttl)
+    return bool(pipe.execute()[-1])
+
+
+def pop_push(full_name: str, branch: str) -> Optional[Tuple[str, List[str]]]:
+    """Take the merged (head, changed paths) of a burst, opening the window for the next one"""
+    key = PUSH_KEY.format(repo=full_name, branch=branch)
+
+    pipe = redis_client.pipeline()
+    pipe.hget(key, "head")
+    pipe.smembers(f"{key}:paths")
+    pipe.delete(key, f"{key}:paths", f"{key}:scheduled")
+    head, paths, _ = pipe.execute()
+
+    if not head:
+        return None
+    return head.decode(), sorted(path.decode() for path in paths)
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import orjson
+import redis
+from fastapi import BackgroundTasks
+from models import User
+from error_handler import AppException
+from cache import cache_get, cache_set, redis_client
+from config import REPO_LIST_FRESH_SECONDS, REPO_LIST_MAX_STALE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+GITHUB_REPOS_URL = "https://api.github.com/user/repos"
+PER_PAGE = 100
+MAX_CONCURRENT_PAGES = 8
+# 10,000 repositories; pages past this are not fetched
+MAX_PAGES = 100
+REQUEST_TIMEOUT = 30.0
+
+REPO_LIST_KEY = "repo_list:{user_id}"
+REFRESH_LOCK_KEY = "repo_list:{user_id}:refreshing"
+REFRESH_LOCK_SECONDS = 30
+
+# Cache status reported in the X-Cache header
+CACHE_FRESH = "fresh"
+CACHE_STALE = "stale"
+CACHE_REVALIDATED = "revalidated"
+CACHE_MISS = "miss"
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client, so listing calls reuse pooled connections to GitHub"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            headers={"Accept": "application/vnd.github+json"}
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _summarize(repo: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": repo["id"],
+        "name": repo["name"],
+        "full_name": repo["full_name"],
+        "url": repo["html_url"],
+        "private": repo["private"],
+        "description": repo.get("description"),
+        "updated_at": repo["updated_at"]
+    }
+
+
+async def _fetch_page(
+    client: httpx.AsyncClient,
+    access_token: str,
+    page: int,
+    etag: Optional[str] = None
+) -> httpx.Response:
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return await client.get(
+        GITHUB_REPOS_URL,
+        headers=headers,
+        params={"per_page": PER_PAGE, "sort": "updated", "page": page}
+    )
+
+
+async def fetch_all_repos(
+    access_token: str,
+    cached_pages: Optional[List[Tuple[Optional[str], List[Dict[str, Any]]]]] = None
+) -> Optional[List[Tuple[Optional[str], List[Dict[str, Any]]]]]:
+    """
+    Fetch every page of the user's repositories as (ETag, repositories)
+    pairs. Each page is revalidated with its cached ETag and a 304 reuses the
+    cached page, so repositories removed from later pages drop out too. The
+    first page's Link header gives the page count; the remaining pages are
+    fetched concurrently. Returns None when every page is unchanged.
+    """
+    client = get_http_client()
+    cached_pages = cached_pages or []
+
+    def cached_etag(page: int) -> Optional[str]:
+        return cached_pages[page - 1][0] if page <= len(cached_pages) else None
+
+    async def fetch(page: int) -> Tuple[httpx.Response, Tuple[Optional[str], List[Dict[str, Any]]]]:
+        response = await _fetch_page(client, access_token, page, cached_etag(page))
+        if response.status_code == 304:
+            return response, cached_pages[page - 1]
+        if response.status_code != 200:
+            raise AppException("Failed to fetch repositories", response.status_code)
+        return response, (response.headers.get("etag"), [_summarize(repo) for repo in response.json()])
+
+    first, page = await fetch(1)
+    results = [(first, page)]
+
+    last = first.links.get("last")
+    if last:
+        last_page = int(httpx.URL(last["url"]).params.get("page", 1))
+    else:
+        # 304s may omit the Link header; fall back to the cached page count
+        last_page = len(cached_pages) if first.status_code == 304 else 1
+    last_page = min(last_page, MAX_PAGES)
+
+    if last_page > 1:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+        async def bounded(page: int):
+            async with semaphore:
+                return await fetch(page)
+
+        results.extend(await asyncio.gather(*(bounded(page) for page in range(2, last_page + 1))))
+
+    if all(response.status_code == 304 for response, _ in results) and last_page == len(cached_pages):
+        return None
+    return [page for _, page in results]
+
+
+def _flatten(pages: List[Tuple[Optional[str], List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    # A repository updated mid-fetch can move between pages and show up twice
+    repos, seen = [], set()
+    for _, page in pages:
+        for repo in page:
+            if repo["id"] not in seen:
+                seen.add(repo["id"])
+                repos.append(repo)
+    return repos
+
+
+def _load(user_id: int) -> Optional[Dict[str, Any]]:
+    raw = cache_get(REPO_LIST_KEY.format(user_id=user_id))
+    entry = orjson.loads(raw) if raw else None
+    # Entries cached before per-page ETags are treated as misses
+    return entry if entry and "pages" in entry else None
+
+
+def _save(user_id: int, entry: Dict[str, Any]):
+    cache_set(REPO_LIST_KEY.format(user_id=user_id), orjson.dumps(entry), REPO_LIST_MAX_STALE_SECONDS)
+
+
+async def refresh_repos(user_id: int, access_token: str, cached: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+    """Revalidate or refetch a user's list and store it; returns (entry, changed)"""
+    pages = await fetch_all_repos(access_token, cached["pages"] if cached else None)
+
+    if pages is None:
+        entry, changed = {**cached, "fetched_at": time.time()}, False
+    else:
+        entry, changed = {"fetched_at": time.time(), "pages": pages}, True
+
+    _save(user_id, entry)
+    return entry, changed
+
+
+def _acquire_refresh_lock(user_id: int) -> bool:
+    try:
+        return bool(redis_client.set(REFRESH_LOCK_KEY.format(user_id=user_id), 1, nx=True, ex=REFRESH_LOCK_SECONDS))
+    except redis.RedisError:
+        return False
+
+
+async def _refresh_in_background(user_id: int, access_token: str, cached: Dict[str, Any]):
+    try:
+        await refresh_repos(user_id, access_token, cached)
+    except Exception as e:
+        logger.warning(f"Background repository refresh failed for user_id={user_id}: {str(e)}")
+    finally:
+        try:
+            redis_client.delete(REFRESH_LOCK_KEY.format(user_id=user_id))
+        except redis.RedisError:
+            pass
+
+
+async def get_user_repos(
+    user: User,
+    background_tasks: BackgroundTasks,
+    refresh: bool = False
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Return the user's full repository list and its cache status. Fresh
+    entries are served as is; stale ones are served immediately while one
+    request per user revalidates them in the background.
+    """
+    cached = _load(user.id)
+
+    if cached and not refresh:
+        if time.time() - cached["fetched_at"] < REPO_LIST_FRESH_SECONDS:
+            return _flatten(cached["pages"]), CACHE_FRESH
+
+        if _acquire_refresh_lock(user.id):
+            background_tasks.add_task(_refresh_in_background, user.id, user.access_token, cached)
+        return _flatten(cached["pages"]), CACHE_STALE
+
+    try:
+        entry, changed = await refresh_repos(user.id, user.access_token, cached)
+    except (AppException, httpx.HTTPError) as e:
+        if cached:
+            logger.warning(f"Serving stale repositories for user_id={user.id}: {str(e)}")
+            return _flatten(cached["pages"]), CACHE_STALE
+        if isinstance(e, AppException):
+            raise
+        raise AppException("Failed to fetch repositories", 502)
+
+    return _flatten(entry["pages"]), CACHE_MISS if changed else CACHE_REVALIDATED
+
+
+def filter_repos(
+    repos: List[Dict[str, Any]],
+    q: Optional[str] = None,
+    visibility: Optional[str] = None,
+    owner: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Case-insensitive search on name, full name and description, plus visibility and owner filters"""
+    q = q.lower() if q else None
+    owner = owner.lower() if owner else None
+
+    filtered = []
+    for repo in repos:
+        if visibility and repo["private"] != (visibility == "private"):
+            continue
+        if owner and repo["full_name"].split("/", 1)[0].lower() != owner:
+            continue
+        if q and q not in repo["full_name"].lower() and q not in (repo["description"] or "").lower():
+            continue
+        filtered.append(repo)
+
+    return filtered
@@ -0,0 +1,37 @@
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+# Fields of a tree entry the review pipeline reads
+ENTRY_FIELDS = ("path", "sha", "size", "url")
+
+
+def parse_tree(raw: bytes, keep: Callable[[str], bool]) -> Dict[str, Any]:
+    """
+    Parse a recursive git tree response into {"files", "paths"}: "files"
+    holds entries (path, sha, size, url) for the blobs keep() accepts and
+    "paths" every blob path. Entries are compacted as the parser produces
+    them, so the full list of GitHub's entry objects (mode, type, ...) never
+    exists at once; for large repositories that list is most of a review's memory.
+    """
+    def compact(pairs: List[Tuple[str, Any]]) -> Any:
+        entry = dict(pairs)
+        if "path" not in entry or "type" not in entry:
+            return entry
+        if entry["type"] != "blob":
+            return None
+        if not keep(entry["path"]):
+            return entry["path"]
+        return {field: entry[field] for field in ENTRY_FIELDS if field in entry}
+
+    entries = json.loads(raw, object_pairs_hook=compact).get("tree") or []
+    files = []
+    paths = []
+    for entry in entries:
+        if entry is None:
+            continue
+        if isinstance(entry, str):
+            paths.append(entry)
+        else:
+            paths.append(entry["path"])
+            files.append(entry)
+    return {"files": files, "paths": paths}
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+import httpx
+import openai
+import redis
+from cache import get_async_redis
+from ai_client import LLMDeadlineExceeded
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_FAILURE_WINDOW,
+    CIRCUIT_COOLDOWN
+)
+
+logger = logging.getLogger(__name__)
+
+# Upstreams guarded by a circuit breaker
+UPSTREAM_GITHUB = "github"
+UPSTREAM_LLM = "llm"
+
+# Error classes
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_SERVER = "server"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_INVALID_RESPONSE = "invalid_response"
+ERROR_CLIENT = "client"
+
+# (base delay, max delay) in seconds for full-jitter exponential backoff
+BACKOFF_POLICIES = {
+    ERROR_RATE_LIMIT: (2.0, 60.0),
+    ERROR_SERVER: (1.0, 20.0),
+    ERROR_TIMEOUT: (1.0, 10.0),
+    ERROR_CONNECTION: (0.5, 10.0),
+    ERROR_INVALID_RESPONSE: (0.2, 2.0),
+}
+
+# Errors that say the upstream itself is unhealthy and count towards opening its circuit
+CIRCUIT_ERRORS = (ERROR_RATE_LIMIT, ERROR_SERVER, ERROR_TIMEOUT, ERROR_CONNECTION)
+# GitHub rate limits are per user token: one exhausted token must not open the circuit for everyone
+GITHUB_CIRCUIT_ERRORS = (ERROR_SERVER, ERROR_TIMEOUT, ERROR_CONNECTION)
+
+# Never wait longer than this for a single Retry-After
+MAX_RETRY_AFTER = 120.0
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit is open"""
+
+    def __init__(self, upstream: str, retry_in: float):
+        self.upstream = upstream
+        self.retry_in = retry_in
+        super().__init__(f"{upstream} is temporarily unavailable, retry in {retry_in:.0f}s")
+
+
+class InvalidResponseError(Exception):
+    """Raised when an upstream answers but the payload is unusable"""
+    pass
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception from GitHub or the LLM provider to an error class"""
+    if isinstance(error, InvalidResponseError):
+        return ERROR_INVALID_RESPONSE
+    if isinstance(error, (LLMDeadlineExceeded, openai.APITimeoutError, httpx.TimeoutException, asyncio.TimeoutError)):
+        return ERROR_TIMEOUT
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return ERROR_CONNECTION
+
+    status = _status_code(error)
+    if status is not None:
+        return classify_status(status, _response(error).headers)
+
+    return ERROR_SERVER
+
+
+def classify_status(status: int, headers: Optional[httpx.Headers] = None) -> str:
+    headers = headers or httpx.Headers()
+    if status == 429:
+        return ERROR_RATE_LIMIT
+    # GitHub signals secondary and primary rate limits with 403
+    if status == 403 and ("retry-after" in headers or headers.get("x-ratelimit-remaining") == "0"):
+        return ERROR_RATE_LIMIT
+    if status >= 500:
+        return ERROR_SERVER
+    return ERROR_CLIENT
+
+
+def is_retryable(error_class: str) -> bool:
+    return error_class in BACKOFF_POLICIES
+
+
+def _response(error: BaseException) -> Optional[httpx.Response]:
+    return getattr(error, "response", None)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code
+    response = _response(error)
+    return response.status_code if isinstance(response, httpx.Response) else None
+
+
+def retry_after_seconds(headers: Optional[httpx.Headers]) -> Optional[float]:
+    """Parse Retry-After (seconds or HTTP date) or GitHub's x-ratelimit-reset"""
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+        except ValueError:
+            try:
+                return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0), MAX_RETRY_AFTER)
+            except (TypeError, ValueError):
+                return None
+
+    if headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset"):
+        try:
+            return min(max(float(headers["x-ratelimit-reset"]) - time.time(), 0.0), MAX_RETRY_AFTER)
+        except ValueError:
+            return None
+
+    return None
+
+
+def backoff_delay(error_class: str, attempt: int, headers: Optional[httpx.Headers] = None) -> float:
+    """Full-jitter exponential backoff for the error class, honoring Retry-After"""
+    base, cap = BACKOFF_POLICIES.get(error_class, BACKOFF_POLICIES[ERROR_SERVER])
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    retry_after = retry_after_seconds(headers)
+    if retry_after is not None:
+        # Small jitter keeps workers that got the same Retry-After from retrying in lockstep
+        delay = retry_after + random.uniform(0, base)
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker whose state lives in Redis, so every worker
+    process shares it.
+
+    Closed: consecutive upstream failures are counted (any success resets the
+    count, which otherwise expires after the failure window); reaching the
+    threshold opens the circuit. Only errors in counted_errors are failures.
+    Open: calls fail fast with CircuitOpenError until the cooldown expires. Half-open: a single worker wins the probe slot and its
+    result closes or re-opens the circuit. If Redis is unreachable the
+    breaker stays closed rather than blocking reviews.
+    """
+
+    def __init__(
+        self,
+        upstream: str,
+        counted_errors: tuple = CIRCUIT_ERRORS,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        failure_window: int = CIRCUIT_FAILURE_WINDOW,
+        cooldown: int = CIRCUIT_COOLDOWN
+    ):
+        self.upstream = upstream
+        self.counted_errors = counted_errors
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.cooldown = cooldown
+        self._failures_key = f"circuit:{upstream}:failures"
+        self._open_key = f"circuit:{upstream}:open"
+        self._probe_key = f"circuit:{upstream}:probe"
+
+    async def before_call(self):
+        """Raise CircuitOpenError if the upstream should not be called right now"""
+        redis_client = get_async_redis()
+        try:
+            ttl = await redis_client.pttl(self._open_key)
+            if ttl and ttl > 0:
+                raise CircuitOpenError(self.upstream, ttl / 1000)
+
+            # After a trip, the first caller past the cooldown probes; others wait for its result
+            failures = int(await redis_client.get(self._failures_key) or 0)
+            if failures >= self.failure_threshold:
+                if not await redis_client.set(self._probe_key, 1, nx=True, ex=self.cooldown):
+                    raise CircuitOpenError(self.upstream, self.cooldown)
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker state unavailable for {self.upstream}: {str(e)}")
+
+    async def record_success(self):
+        try:
+            await get_async_redis().delete(self._failures_key, self._probe_key)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to reset circuit for {self.upstream}: {str(e)}")
+
+    async def record_failure(self):
+        redis_client = get_async_redis()
+        try:
+            pipe = redis_client.pipeline()
+            pipe.incr(self._failures_key)
+            pipe.expire(self._failures_key, self.failure_window + self.cooldown)
+            failures, _ = await pipe.execute()
+
+            if failures >= self.failure_threshold:
+                await redis_client.set(self._open_key, 1, ex=self.cooldown)
+                await redis_client.delete(self._probe_key)
+                logger.warning(f"Circuit opened for {self.upstream} after {failures} failures")
+        except redis.RedisError as e:
+            logger.warning(f"Failed to record circuit failure for {self.upstream}: {str(e)}")
+
+
+circuit_breakers = {
+    UPSTREAM_GITHUB: CircuitBreaker(UPSTREAM_GITHUB, GITHUB_CIRCUIT_ERRORS),
+    UPSTREAM_LLM: CircuitBreaker(UPSTREAM_LLM),
+}
+
+
+async def get_with_retries(
+    client: httpx.AsyncClient,
+    upstream: str,
+    url: str,
+    headers: dict,
+    max_attempts: int
+) -> httpx.Response:
+    """
+    GET with retries for rate limits and server errors. Other error statuses
+    are returned to the caller; exhausted retries raise httpx.HTTPStatusError.
+    """
+    async def attempt() -> httpx.Response:
+        response = await client.get(url, headers=headers)
+        if response.status_code >= 400 and is_retryable(classify_status(response.status_code, response.headers)):
+            response.raise_for_status()
+        return response
+
+    return await call_with_retries(upstream, attempt, max_attempts, f"GET {url}")
+
+
+async def call_with_retries(
+    upstream: str,
+    func: Callable[[], Awaitable[Any]],
+    max_attempts: int,
+    description: str = ""
+) -> Any:
+    """
+    Call func with per-error-class backoff and the upstream's circuit breaker.
+    Non-retryable errors and CircuitOpenError are raised immediately.
+    """
+    breaker = circuit_breakers[upstream]
+
+    for attempt in range(max_attempts):
+        await breaker.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            error_class = classify_error(e)
+            if error_class in breaker.counted_errors:
+                await breaker.record_failure()
+            else:
+                # The upstream answered, so it is healthy even if the answer was unusable
+                await breaker.record_success()
+
+            if not is_retryable(error_class) or attempt == max_attempts - 1:
+                raise
+
+            response = _response(e)
+            delay = backoff_delay(error_class, attempt, response.headers if response is not None else None)
+            logger.warning(
+                f"{description or upstream} attempt {attempt + 1} failed ({error_class}): {str(e)}; "
+                f"retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+            continue
+
+        await breaker.record_success()
+        return result
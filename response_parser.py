@@ -0,0 +1,153 @@
+import re
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Type
+import orjson
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+
+# Truncation repair tries at most this many cut points, starting from the end
+MAX_REPAIR_CANDIDATES = 32
+
+# Process-wide accounting of how responses were recovered
+parse_stats = Counter()
+
+
+def _strip_code_fences(text: str) -> str:
+    match = CODE_FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def _extract_object(text: str) -> str:
+    start = text.find("{")
+    if start == -1:
+        return text
+    end = text.rfind("}")
+    # A missing closing brace is left for the truncation repair
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _scan(text: str) -> Tuple[str, List[Tuple[int, Tuple[str, ...]]], List[str], bool]:
+    """
+    Single pass over the text outside of strings. Drops trailing commas and
+    records cut points (after complete values) with the closers open there.
+    Returns (cleaned text, cut points, open closers at the end, ends inside a string).
+    """
+    out: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    stack: List[str] = []
+    in_string = escape = False
+    pending_comma = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if pending_comma:
+            if char.isspace():
+                continue
+            pending_comma = False
+            if char not in "}]":
+                cuts.append((len(out), tuple(stack)))
+                out.append(",")
+
+        if char == ",":
+            pending_comma = True
+            continue
+
+        out.append(char)
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((len(out), tuple(stack)))
+
+    if pending_comma:
+        cuts.append((len(out), tuple(stack)))
+
+    return "".join(out), cuts, stack, in_string
+
+
+def _repair_candidates(text: str):
+    """Yield progressively more aggressive repairs of malformed or truncated JSON"""
+    cleaned, cuts, stack, in_string = _scan(text)
+    yield cleaned
+
+    # Truncated at a value boundary: just close what is open
+    closing = '"' if in_string else ""
+    yield cleaned + closing + "".join(reversed(stack))
+
+    # Truncated mid-value: cut back to the last complete element and close
+    for position, open_stack in reversed(cuts[-MAX_REPAIR_CANDIDATES:]):
+        yield cleaned[:position] + "".join(reversed(open_stack))
+
+
+def load_json(raw: str) -> Tuple[Optional[Any], bool]:
+    """
+    Decode a model response, repairing code fences, surrounding prose,
+    trailing commas and truncation when needed. Returns (value, repaired).
+    """
+    try:
+        return orjson.loads(raw), False
+    except orjson.JSONDecodeError:
+        pass
+
+    text = _extract_object(_strip_code_fences(raw.strip()))
+    for candidate in _repair_candidates(text):
+        try:
+            value = orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value, True
+
+    return None, False
+
+
+def parse_review_response(
+    raw: str,
+    schema: Type[BaseModel],
+    defaults: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse and validate a structure or file review response against its schema.
+    Missing fields listed in defaults are filled in and repaired results are
+    flagged with "repaired". Returns None when the response cannot be
+    repaired, so the caller can re-call the model.
+    """
+    value, repaired = load_json(raw or "")
+    if not isinstance(value, dict):
+        parse_stats["unrecoverable"] += 1
+        logger.warning(f"Unrecoverable AI response ({len(raw or '')} chars)")
+        return None
+
+    for key, default in (defaults or {}).items():
+        value.setdefault(key, default)
+
+    try:
+        result = schema.model_validate(value).model_dump(exclude_none=True)
+    except ValidationError as e:
+        parse_stats["invalid"] += 1
+        logger.warning(f"AI response failed {schema.__name__} validation: {e.error_count()} errors")
+        return None
+
+    if repaired:
+        parse_stats["repaired"] += 1
+        result["repaired"] = True
+        logger.info(f"Repaired malformed AI response for {schema.__name__}")
+    else:
+        parse_stats["valid"] += 1
+    return result
@@ -1,15 +1,21 @@
 import httpx
+import redis
+from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from models import User, Review
 from error_handler import AppException
-from tasks import process_review_task
+from task_queue import PROCESS_REVIEW_TASK, enqueue_task, revoke_task
+from cancellation import request_cancellation
+from socket_manager import emit_review_cancelled
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
 
 class ReviewService:
     def __init__(self, user: User, db: Session):
         self.user = user
         self.db = db
     
-    async def start_review(self, repo_url: str):
+    async def start_review(self, repo_url: str, options: Optional[Dict[str, Any]] = None):
         repo_parts = repo_url.rstrip("/").split("/")
         if len(repo_parts) < 2:
             raise AppException("Invalid repository URL", 400)
@@ -34,10 +40,40 @@ class ReviewService:
         self.db.commit()
         self.db.refresh(review)
         
-        process_review_task.apply_async(args=[review.id, self.user.id, repo_url])
+        task = enqueue_task(PROCESS_REVIEW_TASK, [review.id, self.user.id, repo_url, options or {}])
+        review.task_id = task.id
+        self.db.commit()
         
         return {
             "review_id": review.id,
             "status": "started",
             "message": "Review process started. Connect to WebSocket for progress updates."
         }
+    
+    async def cancel_review(self, review_id: int):
+        review = self.db.query(Review).filter(Review.id == review_id, Review.user_id == self.user.id).first()
+        
+        if not review:
+            raise AppException("Review not found", 404)
+        
+        if review.status in FINISHED_STATUSES:
+            raise AppException(f"Review already {review.status}", 409)
+        
+        # The flag stops a running worker; revoking drops a task that has not started yet
+        try:
+            request_cancellation(review.id)
+        except redis.RedisError:
+            raise AppException("Unable to cancel review right now", 503)
+        
+        if review.task_id:
+            revoke_task(review.task_id)
+        
+        if review.status == "pending":
+            review.status = "cancelled"
+            self.db.commit()
+            await emit_review_cancelled(review.id, progress=review.progress or 0)
+        
+        return {
+            "review_id": review.id,
+            "status": "cancelling" if review.status != "cancelled" else "cancelled"
+        }
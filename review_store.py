@@ -0,0 +1,100 @@
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+import orjson
+from cache import cache_get, cache_set
+from config import REVIEW_STORE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts or result shapes change so stale results are never served
+STORE_VERSION = "v4"
+
+TREE_KEY = "review_store:{version}:tree:{repo}:{branch}"
+STRUCTURE_KEY = "review_store:{version}:structure:{digest}"
+FILE_KEY = "review_store:{version}:file:{sha}"
+SECRETS_KEY = "review_store:{version}:secrets:{sha}"
+
+
+def _load(key: str) -> Optional[Dict[str, Any]]:
+    raw = cache_get(key)
+    if raw is None:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        logger.warning(f"Discarding corrupt store entry {key}")
+        return None
+
+
+def _save(key: str, value: Dict[str, Any]):
+    cache_set(key, orjson.dumps(value), REVIEW_STORE_TTL)
+
+
+def _tree_key(owner: str, repo_name: str, branch: str) -> str:
+    # GitHub names are case-insensitive; webhooks and user-entered URLs may differ in case
+    return TREE_KEY.format(version=STORE_VERSION, repo=f"{owner}/{repo_name}".lower(), branch=branch)
+
+
+def load_tree(owner: str, repo_name: str, branch: str) -> Optional[Dict[str, Any]]:
+    """Return the last tree fetched for a branch as {"etag", "tree"}, for a conditional request; see repo_tree.parse_tree"""
+    return _load(_tree_key(owner, repo_name, branch))
+
+
+def save_tree(owner: str, repo_name: str, branch: str, etag: Optional[str], tree: Dict[str, Any]):
+    if etag:
+        _save(_tree_key(owner, repo_name, branch), {"etag": etag, "tree": tree})
+
+
+def _structure_key(file_tree: str) -> str:
+    digest = hashlib.sha256(file_tree.encode("utf-8")).hexdigest()
+    return STRUCTURE_KEY.format(version=STORE_VERSION, digest=digest)
+
+
+def load_structure_review(file_tree: str) -> Optional[Dict[str, Any]]:
+    return _load(_structure_key(file_tree))
+
+
+def save_structure_review(file_tree: str, structure_review: Dict[str, Any]):
+    _save(_structure_key(file_tree), structure_review)
+
+
+def load_file_result(sha: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored outcome for a blob: {"skip_reason": ...} for blobs
+    skipped on their content, or {"file_review": ...} for reviewed blobs.
+    """
+    if not sha:
+        return None
+    return _load(FILE_KEY.format(version=STORE_VERSION, sha=sha))
+
+
+def save_file_result(
+    sha: Optional[str],
+    file_review: Optional[Dict[str, Any]] = None,
+    skip_reason: Optional[str] = None
+):
+    """Store a blob's outcome; blobs are content-addressed, so it holds for any path or commit"""
+    if not sha:
+        return
+    value = {"skip_reason": skip_reason} if skip_reason else {"file_review": file_review}
+    _save(FILE_KEY.format(version=STORE_VERSION, sha=sha), value)
+
+
+def load_secret_scan(sha: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Secret scanner findings of a blob, or None if no scan of it was recorded"""
+    if not sha:
+        return None
+    stored = _load(SECRETS_KEY.format(version=STORE_VERSION, sha=sha))
+    return stored["findings"] if stored else None
+
+
+def load_secret_findings(sha: Optional[str]) -> List[Dict[str, Any]]:
+    """Secret scanner findings recorded when a blob was fetched; empty if there were none"""
+    return load_secret_scan(sha) or []
+
+
+def save_secret_findings(sha: Optional[str], findings: List[Dict[str, Any]], keep_empty: bool = False):
+    """keep_empty also records clean scans, for blobs fetched only to be scanned"""
+    if sha and (findings or keep_empty):
+        _save(SECRETS_KEY.format(version=STORE_VERSION, sha=sha), {"findings": findings})
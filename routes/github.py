@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 import httpx
 from database import get_db
-from models import User
+from models import User, WatchedRepository
 from auth_utils import verify_token
 from error_handler import AppException
 from schemas import ReviewRequest
 from review_service import ReviewService
+from repo_listing import get_user_repos, filter_repos
 
 router = APIRouter()
 
@@ -27,33 +29,23 @@ async def get_current_user(authorization: str = Header(...), db: Session = Depen
     return user
 
 @router.get("/repos")
-async def list_repos(current_user: User = Depends(get_current_user)):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user/repos",
-            headers={"Authorization": f"Bearer {current_user.access_token}"},
-            params={"per_page": 100, "sort": "updated"}
-        )
-        
-        if response.status_code != 200:
-            raise AppException("Failed to fetch repositories", response.status_code)
-        
-        repos = response.json()
-        # socket
-        return {
-            "repos": [
-                {
-                    "id": repo["id"],
-                    "name": repo["name"],
-                    "full_name": repo["full_name"],
-                    "url": repo["html_url"],
-                    "private": repo["private"],
-                    "description": repo.get("description"),
-                    "updated_at": repo["updated_at"]
-                }
-                for repo in repos
-            ]
-        }
+async def list_repos(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    q: Optional[str] = Query(None),
+    visibility: Optional[str] = Query(None, pattern="^(public|private)$"),
+    owner: Optional[str] = Query(None),
+    refresh: bool = Query(False),
+    current_user: User = Depends(get_current_user)
+):
+    repos, cache_status = await get_user_repos(current_user, background_tasks, refresh=refresh)
+    repos = filter_repos(repos, q=q, visibility=visibility, owner=owner)
+    
+    response.headers["X-Cache"] = cache_status
+    return {
+        "repos": repos,
+        "total": len(repos)
+    }
 
 @router.post("/review")
 async def create_review(
@@ -62,5 +54,53 @@ async def create_review(
     db: Session = Depends(get_db)
 ):
     review_service = ReviewService(current_user, db)
-    result = await review_service.start_review(request.repo_url)
+    result = await review_service.start_review(
+        request.repo_url,
+        options=request.model_dump(exclude={"repo_url"}, exclude_none=True)
+    )
     return result
+
+@router.put("/repos/{owner}/{repo_name}/prewarm")
+async def enable_prewarm(
+    owner: str,
+    repo_name: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Opt a repository in to pre-reviews triggered by its push webhook"""
+    full_name = f"{owner}/{repo_name}".lower()
+    
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            f"https://api.github.com/repos/{owner}/{repo_name}",
+            headers={"Authorization": f"Bearer {current_user.access_token}"}
+        )
+        if response.status_code != 200:
+            raise AppException("Repository not found or access denied", response.status_code)
+    
+    watch = db.query(WatchedRepository).filter(
+        WatchedRepository.user_id == current_user.id,
+        WatchedRepository.full_name == full_name
+    ).first()
+    
+    if not watch:
+        db.add(WatchedRepository(user_id=current_user.id, full_name=full_name))
+        db.commit()
+    
+    return {"full_name": full_name, "prewarm": True}
+
+@router.delete("/repos/{owner}/{repo_name}/prewarm")
+async def disable_prewarm(
+    owner: str,
+    repo_name: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    full_name = f"{owner}/{repo_name}".lower()
+    db.query(WatchedRepository).filter(
+        WatchedRepository.user_id == current_user.id,
+        WatchedRepository.full_name == full_name
+    ).delete()
+    db.commit()
+    
+    return {"full_name": full_name, "prewarm": False}
@@ -1,35 +1,145 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, defer
 from database import get_db
 from models import Review
 from routes.github import get_current_user
+from review_service import ReviewService
 from error_handler import AppException
+from cache import cache_get, cache_set
+from analytics import SEVERITIES, issue_analytics
+from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
 import json
 
 router = APIRouter()
 
+REVIEW_FIELDS = ("id", "repo_url", "status", "progress", "created_at", "review_content", "stats")
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+MAX_PAGE_SIZE = 100
+RESPONSE_CACHE_TTL = 3600
+MAX_ANALYTICS_DAYS = 365
+
+# Registered before /{review_id} so "analytics" is not parsed as a review id
+@router.get("/analytics")
+async def get_analytics(
+    repo_url: Optional[str] = Query(None),
+    severity: Optional[str] = Query(None, pattern=f"^({'|'.join(SEVERITIES)})$"),
+    type: Optional[str] = Query(None),
+    days: int = Query(30, ge=1, le=MAX_ANALYTICS_DAYS),
+    top_files: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    since = datetime.utcnow() - timedelta(days=days)
+    result = issue_analytics(
+        db,
+        current_user.id,
+        since,
+        repo_url=repo_url,
+        severity=severity,
+        issue_type=type.lower() if type else None,
+        top_files=top_files
+    )
+    return {"since": since, "days": days, **result}
+
 @router.get("/{review_id}")
-async def get_review(review_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    review = db.query(Review).filter(Review.id == review_id, Review.user_id == current_user.id).first()
+async def get_review(
+    review_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None),
+    cursor: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    selected = parse_fields(fields)
+    
+    # Defer the review blob so unchanged polls never load it
+    review = db.query(Review).options(defer(Review.review_content)).filter(
+        Review.id == review_id, Review.user_id == current_user.id
+    ).first()
     
     if not review:
         raise AppException("Review not found", 404)
     
-    review_data = json.loads(review.review_content) if review.review_content else {}
+    etag = compute_review_etag(review, f"{','.join(selected)}|{cursor}|{limit}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
     
-    # Calculate statistics
-    stats = calculate_review_stats(review_data)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
     
-    return {
+    cache_key = f"review_response:{review.id}:{etag}"
+    is_terminal = review.status in TERMINAL_STATUSES
+    if is_terminal:
+        cached = cache_get(cache_key)
+        if cached:
+            return Response(content=cached, media_type="application/json", headers=headers)
+    
+    result = {
         "id": review.id,
         "repo_url": review.repo_url,
         "status": review.status,
         "progress": review.progress,
-        "created_at": review.created_at,
-        "review_content": review_data,
-        "stats": stats
+        "created_at": review.created_at
     }
+    
+    if "review_content" in selected or "stats" in selected:
+        review_data = json.loads(review.review_content) if review.review_content else {}
+        
+        if "stats" in selected:
+            result["stats"] = calculate_review_stats(review_data)
+        
+        if "review_content" in selected:
+            if limit is not None:
+                file_reviews = review_data.get("file_reviews", [])
+                next_cursor = cursor + limit
+                review_data["file_reviews"] = file_reviews[cursor:next_cursor]
+                result["pagination"] = {
+                    "cursor": cursor,
+                    "limit": limit,
+                    "total": len(file_reviews),
+                    "next_cursor": next_cursor if next_cursor < len(file_reviews) else None
+                }
+            result["review_content"] = review_data
+    
+    result = {key: value for key, value in result.items() if key in selected or key == "pagination"}
+    body = json.dumps(jsonable_encoder(result)).encode("utf-8")
+    
+    # Terminal reviews no longer change, so their rendered responses can be reused
+    if is_terminal:
+        cache_set(cache_key, body, RESPONSE_CACHE_TTL)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    if not fields:
+        return REVIEW_FIELDS
+    
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(REVIEW_FIELDS)
+    if unknown:
+        raise AppException(f"Unknown fields: {', '.join(sorted(unknown))}", 400)
+    
+    return tuple(field for field in REVIEW_FIELDS if field in requested)
+
+def compute_review_etag(review: Review, variant: str) -> str:
+    updated_at = review.updated_at.isoformat() if review.updated_at else ""
+    raw = f"{review.id}:{review.status}:{review.progress}:{updated_at}:{variant}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+@router.post("/{review_id}/cancel")
+async def cancel_review(review_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    review_service = ReviewService(current_user, db)
+    return await review_service.cancel_review(review_id)
 
 @router.get("/")
 async def get_review_history(repo_url: Optional[str] = Query(None), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
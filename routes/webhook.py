@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, Header, Request
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+import orjson
+import redis
+from database import get_db
+from models import WatchedRepository
+from error_handler import AppException
+from config import GITHUB_WEBHOOK_SECRET, WEBHOOK_DEBOUNCE_SECONDS
+from push_webhook import verify_signature, parse_push, record_push
+from task_queue import PREWARM_REVIEW_TASK, enqueue_task
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(...),
+    x_hub_signature_256: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    if not GITHUB_WEBHOOK_SECRET:
+        raise AppException("Webhooks are not configured", 503)
+
+    body = await request.body()
+    if not verify_signature(body, x_hub_signature_256):
+        raise AppException("Invalid webhook signature", 401)
+
+    if x_github_event == "ping":
+        return {"status": "pong"}
+    if x_github_event != "push":
+        return {"status": "ignored", "reason": f"unsupported event {x_github_event}"}
+
+    try:
+        push = parse_push(orjson.loads(body))
+    except orjson.JSONDecodeError:
+        raise AppException("Invalid webhook payload", 400)
+
+    if push is None:
+        return {"status": "ignored", "reason": "not a push to the default branch"}
+
+    # The earliest opt-in supplies the access token used for the pre-review
+    watch = db.query(WatchedRepository).filter(
+        WatchedRepository.full_name == push["full_name"]
+    ).order_by(WatchedRepository.created_at).first()
+
+    if not watch:
+        return {"status": "ignored", "reason": "repository not opted in"}
+
+    try:
+        first_in_burst = record_push(push["full_name"], push["branch"], push["head"], push["paths"])
+    except redis.RedisError as e:
+        logger.warning(f"Could not record push for {push['full_name']}: {str(e)}")
+        raise AppException("Unable to queue pre-review right now", 503)
+
+    if not first_in_burst:
+        return {"status": "debounced", "head": push["head"]}
+
+    enqueue_task(
+        PREWARM_REVIEW_TASK,
+        [watch.user_id, push["full_name"], push["branch"]],
+        countdown=WEBHOOK_DEBOUNCE_SECONDS
+    )
+    logger.info(f"Pre-review of {push['full_name']}@{push['head'][:7]} queued")
+    return {"status": "queued", "head": push["head"]}
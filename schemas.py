@@ -1,7 +1,131 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator, model_validator
+from typing import Any, List, Optional
 
 class GitHubCallbackRequest(BaseModel):
     code: str
 
 class ReviewRequest(BaseModel):
     repo_url: str
+    include_patterns: Optional[List[str]] = None
+    exclude_patterns: Optional[List[str]] = None
+    # Overrides NEAR_DUPLICATE_THRESHOLD for this review; 0 reviews every file
+    near_duplicate_threshold: Optional[float] = Field(None, ge=0, le=1)
+    # Budgets: the review finishes with the results it has, marked partial, when either runs out
+    deadline_seconds: Optional[float] = Field(None, ge=10, le=3600)
+    token_budget: Optional[int] = Field(None, ge=1000)
+    # Streaming mode for very large repositories; by default chosen from the tree size
+    streaming: Optional[bool] = None
+
+
+# AI response shapes, validated leniently so near-miss responses can be kept
+SEVERITY_ALIASES = {
+    "critical": "critical", "high": "critical", "error": "critical", "blocker": "critical",
+    "warning": "warning", "warn": "warning", "medium": "warning", "major": "warning",
+    "info": "info", "low": "info", "minor": "info", "note": "info", "suggestion": "info",
+}
+
+OVERALL_RATINGS = ("good", "needs_improvement", "poor")
+
+class ReviewIssue(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    line: Optional[int] = None
+    type: str = "style"
+    severity: str = "info"
+    message: str = ""
+    suggestion: str = ""
+
+    @field_validator("type", "message", "suggestion", mode="before")
+    @classmethod
+    def default_missing_text(cls, value: Any, info: ValidationInfo) -> str:
+        # Models send null for fields they have nothing to say about
+        if value is None:
+            return cls.model_fields[info.field_name].default
+        return value if isinstance(value, str) else str(value)
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def normalize_severity(cls, value: Any) -> str:
+        return SEVERITY_ALIASES.get(str(value).strip().lower(), "info")
+
+    @field_validator("line", mode="before")
+    @classmethod
+    def coerce_line(cls, value: Any) -> Optional[int]:
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value.strip())
+        return None
+
+def _issue_dicts(value: Any) -> List[dict]:
+    # Drop malformed or truncated entries instead of rejecting the whole response
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        return value
+    return [item for item in value if isinstance(item, dict) and item.get("message")]
+
+class FileReviewSummary(BaseModel):
+    total_issues: int = 0
+    critical: int = 0
+    warnings: int = 0
+    info: int = 0
+
+    @classmethod
+    def from_issues(cls, issues: List[ReviewIssue]) -> "FileReviewSummary":
+        critical = sum(1 for issue in issues if issue.severity == "critical")
+        warnings = sum(1 for issue in issues if issue.severity == "warning")
+        return cls(
+            total_issues=len(issues),
+            critical=critical,
+            warnings=warnings,
+            info=len(issues) - critical - warnings
+        )
+
+class FileReviewResult(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    filename: str
+    issues: List[ReviewIssue]
+    summary: Optional[FileReviewSummary] = None
+
+    @field_validator("issues", mode="before")
+    @classmethod
+    def drop_malformed_issues(cls, value: Any) -> Any:
+        return _issue_dicts(value)
+
+    @model_validator(mode="after")
+    def recompute_summary(self) -> "FileReviewResult":
+        # The summary is derived data; recomputing keeps it consistent with the issues
+        self.summary = FileReviewSummary.from_issues(self.issues)
+        return self
+
+class StructureReviewResult(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    overall_rating: str
+    issues: List[ReviewIssue]
+    strengths: List[str] = []
+    recommendations: List[str] = []
+
+    @field_validator("issues", mode="before")
+    @classmethod
+    def drop_malformed_issues(cls, value: Any) -> Any:
+        return _issue_dicts(value)
+
+    @field_validator("strengths", "recommendations", mode="before")
+    @classmethod
+    def string_list(cls, value: Any) -> Any:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, list):
+            return [item if isinstance(item, str) else str(item) for item in value if item is not None]
+        return value
+
+    @field_validator("overall_rating", mode="before")
+    @classmethod
+    def normalize_rating(cls, value: Any) -> str:
+        rating = str(value).strip().lower().replace(" ", "_")
+        return rating if rating in OVERALL_RATINGS else "needs_improvement"
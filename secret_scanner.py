@@ -0,0 +1,162 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Rules: (literal anchors in lowercase, pattern matched from an anchor hit, label).
+# Provider formats are matched outright; generic assignments to secret-looking
+# names only count when the value looks random (entropy check below).
+RULES = {
+    "private_key": (("-----begin",), r"-----BEGIN [A-Z ]{0,20}PRIVATE KEY(?: BLOCK)?-----", "private key"),
+    "aws_access_key": (("akia", "asia"), r"(?:AKIA|ASIA)[0-9A-Z]{16}(?![0-9A-Za-z])", "AWS access key"),
+    "github_token": (
+        ("ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_"),
+        r"(?:gh[pousr]_[A-Za-z0-9]{36,255}|github_pat_[A-Za-z0-9_]{60,255})(?![0-9A-Za-z])",
+        "GitHub token"
+    ),
+    "slack_token": (("xox",), r"xox[abposr]-[A-Za-z0-9-]{10,}", "Slack token"),
+    "stripe_key": (("sk_live_", "rk_live_"), r"[rs]k_live_[0-9A-Za-z]{20,}", "Stripe live key"),
+    "google_api_key": (("aiza",), r"AIza[0-9A-Za-z_-]{35}(?![0-9A-Za-z_-])", "Google API key"),
+    "llm_api_key": (("sk-", "gsk_"), r"(?:sk-(?:proj-|ant-)?[A-Za-z0-9_-]{32,}|gsk_[A-Za-z0-9]{40,})", "LLM provider API key"),
+    "jwt": (("eyj",), r"eyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}", "JSON Web Token"),
+    "url_credentials": (("://",), r"://[^\s:/@'\"]{1,64}:(?P<value>[^\s:/@'\"]{3,128})@", "credentials in a URL"),
+    "generic_secret": (
+        ("secret", "passw", "pwd", "token", "api_key", "api-key", "apikey",
+         "access_key", "access-key", "private_key", "private-key"),
+        r"(?i:secret|passw(?:or)?d|pwd|token|api[_-]?key|access[_-]?key|private[_-]?key)"
+        r"[\w.-]{0,32}[\"']?\s{0,4}(?::=|=>|[:=])\s{0,4}[\"'](?P<value>[^\"'\s]{12,256})[\"']",
+        "hard-coded secret"
+    ),
+}
+# Provider tokens must not continue a longer identifier
+BOUNDARY_RULES = {"aws_access_key", "github_token", "slack_token", "stripe_key", "google_api_key", "llm_api_key", "jwt"}
+CRITICAL_RULES = {"private_key", "aws_access_key", "github_token", "slack_token", "stripe_key", "llm_api_key"}
+
+ANCHOR_RULES = {anchor: name for name, (anchors, _, _) in RULES.items() for anchor in anchors}
+# Every anchor in one compiled alternation, longest first. It runs over lowercased
+# content: case-insensitive matching is several times slower.
+ANCHOR_SOURCE = "|".join(re.escape(anchor) for anchor in sorted(ANCHOR_RULES, key=len, reverse=True))
+ANCHOR_PATTERN = re.compile(ANCHOR_SOURCE)
+# Fallback for content whose length changes when lowercased
+ANCHOR_PATTERN_ANY_CASE = re.compile(ANCHOR_SOURCE, re.IGNORECASE)
+RULE_PATTERNS = {name: re.compile(pattern) for name, (_, pattern, _) in RULES.items()}
+LABELS = {name: label for name, (_, _, label) in RULES.items()}
+PROVIDER_RULES = [name for name in RULES if name not in ("generic_secret", "url_credentials")]
+
+MIN_GENERIC_ENTROPY = 3.5
+PLACEHOLDER_PATTERN = re.compile(
+    r"(?i)example|sample|dummy|placeholder|changeme|change_me|your[_-]|xxxx|\*\*\*|<[^>]*>|\$\{|\{\{|%\(|process\.env|os\.environ|getenv"
+)
+MAX_FINDINGS_PER_FILE = 20
+# Scanning runs on the event loop; bounds the time spent on one huge blob
+MAX_SCAN_CHARS = 2_000_000
+
+SUGGESTION = "Remove it from the repository, rotate it, and load it from the environment or a secret manager"
+
+
+def shannon_entropy(value: str) -> float:
+    """Bits per character"""
+    length = len(value)
+    return -sum(count / length * math.log2(count / length) for count in Counter(value).values())
+
+
+def _provider_rule(value: str):
+    """The provider rule a generic secret's value matches in full, if any"""
+    for name in PROVIDER_RULES:
+        if RULE_PATTERNS[name].fullmatch(value):
+            return name
+    return None
+
+
+def _check(rule: str, match: re.Match):
+    """Return the rule a verified hit reports, or None for placeholders and low-entropy values"""
+    if rule == "generic_secret":
+        value = match.group("value")
+        if PLACEHOLDER_PATTERN.search(value):
+            return None
+        provider = _provider_rule(value)
+        if provider:
+            return provider
+        return rule if shannon_entropy(value) >= MIN_GENERIC_ENTROPY else None
+    value = match.group("value") if rule == "url_credentials" else match.group(0)
+    return None if PLACEHOLDER_PATTERN.search(value) else rule
+
+
+def _anchor_hits(content: str) -> List[Tuple[int, str]]:
+    """
+    Offsets of every rule's literal anchors, in order, from a single pass of
+    the combined anchor pattern. Only these offsets are checked with the
+    rule patterns.
+    """
+    lowered = content.lower()
+    if len(lowered) != len(content):
+        # Some non-ASCII characters change length when lowercased; offsets must match the content
+        return [(hit.start(), ANCHOR_RULES[hit.group(0).lower()]) for hit in ANCHOR_PATTERN_ANY_CASE.finditer(content)]
+    return [(hit.start(), ANCHOR_RULES[hit.group(0)]) for hit in ANCHOR_PATTERN.finditer(lowered)]
+
+
+def scan_secrets(content: str) -> List[Dict[str, Any]]:
+    """
+    Find committed credentials in a file's full content. Returns issues in
+    the review issue format (type "security"); secret values are not included.
+    """
+    content = content[:MAX_SCAN_CHARS]
+    issues = []
+    line, position, covered = 1, 0, 0
+    for start, rule in _anchor_hits(content):
+        if start < covered:
+            continue
+
+        if rule in BOUNDARY_RULES and start and (content[start - 1].isalnum() or content[start - 1] == "_"):
+            continue
+        match = RULE_PATTERNS[rule].match(content, start)
+        if not match:
+            continue
+        reported = _check(rule, match)
+        if not reported:
+            continue
+
+        covered = match.end()
+        line += content.count("\n", position, start)
+        position = start
+        issues.append({
+            "line": line,
+            "type": "security",
+            "severity": "critical" if reported in CRITICAL_RULES else "warning",
+            "message": f"Possible {LABELS[reported]} committed in source",
+            "suggestion": SUGGESTION,
+            "rule": reported,
+            "source": "secret_scan"
+        })
+        if len(issues) >= MAX_FINDINGS_PER_FILE:
+            break
+    return issues
+
+
+def summarize_issues(issues: List[Dict[str, Any]]) -> Dict[str, int]:
+    critical = sum(1 for issue in issues if issue.get("severity") == "critical")
+    warnings = sum(1 for issue in issues if issue.get("severity") == "warning")
+    return {
+        "total_issues": len(issues),
+        "critical": critical,
+        "warnings": warnings,
+        "info": len(issues) - critical - warnings
+    }
+
+
+def secret_review(filename: str, findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A file review holding only scanner findings, sent before (or instead of) the model's review"""
+    return {"filename": filename, "issues": findings, "summary": summarize_issues(findings), "secret_scan": True}
+
+
+def merge_secret_findings(file_review: Dict[str, Any], findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add scanner findings to a model review, replacing model security issues on the same lines"""
+    if not findings:
+        return file_review
+    lines = {finding["line"] for finding in findings}
+    issues = [
+        issue for issue in file_review.get("issues") or []
+        if not (issue.get("type") == "security" and issue.get("line") in lines)
+    ]
+    issues.extend(findings)
+    return {**file_review, "issues": issues, "summary": summarize_issues(issues)}
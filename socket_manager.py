@@ -1,12 +1,74 @@
 import socketio
 import logging
-from typing import Dict, Any, Optional
-from config import REDIS_URL
+import zlib
+import orjson
+from redis.exceptions import RedisError
+from typing import Dict, Any, List, Optional
+from config import REDIS_URL, SOCKET_SERIALIZER, SOCKET_COMPRESS_MIN_BYTES
 
 logger = logging.getLogger(__name__)
 
+# Leading byte of compact messages; pickled messages start with 0x80
+COMPACT_PLAIN = b"\x01"
+COMPACT_ZLIB = b"\x02"
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Serialize a pub/sub message with orjson, compressing large ones"""
+    payload = orjson.dumps(message)
+    if len(payload) >= SOCKET_COMPRESS_MIN_BYTES:
+        return COMPACT_ZLIB + zlib.compress(payload)
+    return COMPACT_PLAIN + payload
+
+
+def decode_message(message: Any) -> Any:
+    """Decode a compact message; anything else is passed through for the stock decoder"""
+    if isinstance(message, bytes):
+        if message.startswith(COMPACT_PLAIN):
+            return orjson.loads(message[1:])
+        if message.startswith(COMPACT_ZLIB):
+            return orjson.loads(zlib.decompress(message[1:]))
+    return message
+
+
+class CompactRedisManager(socketio.AsyncRedisManager):
+    """
+    Redis manager that publishes emits as orjson, zlib-compressed above
+    SOCKET_COMPRESS_MIN_BYTES, instead of pickle. Messages it cannot
+    represent exactly (callbacks, multi-argument emits) still use pickle, and
+    pickled messages from other processes are still read. Every API and
+    worker process must use it before any of them publishes compact messages.
+    """
+
+    async def _publish(self, data):
+        if data.get("method") != "emit" or data.get("callback") or not isinstance(data.get("data"), dict):
+            return await super()._publish(data)
+
+        payload = encode_message(data)
+        retry = True
+        while True:
+            try:
+                if not retry:
+                    self._redis_connect()
+                return await self.redis.publish(self.channel, payload)
+            except RedisError:
+                if retry:
+                    logger.error("Cannot publish to redis... retrying")
+                    retry = False
+                else:
+                    logger.error("Cannot publish to redis... giving up")
+                    break
+
+    async def _listen(self):
+        async for message in super()._listen():
+            yield decode_message(message)
+
+
 # Create Redis-based client manager for cross-process communication
-mgr = socketio.AsyncRedisManager(REDIS_URL)
+if SOCKET_SERIALIZER == "compact":
+    mgr = CompactRedisManager(REDIS_URL)
+else:
+    mgr = socketio.AsyncRedisManager(REDIS_URL)
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
@@ -82,21 +144,53 @@ async def emit_reviewing_file(
     })
 
 
-async def emit_file_complete(review_id: int, progress: int, file_review: Dict[str, Any]):
-    """Emit when file review is complete"""
-    await emit_progress(review_id, {
+async def emit_file_complete(review_id: int, progress: int, file_review: Dict[str, Any], replaces: bool = False):
+    """
+    Emit when file review is complete. replaces marks a review that supersedes
+    the scanner-only review sent earlier for the same file.
+    """
+    data = {
         "status": "file_complete",
         "progress": progress,
         "file_review": file_review
+    }
+    if replaces:
+        data["replaces"] = True
+    await emit_progress(review_id, data)
+
+
+async def emit_file_skipped(review_id: int, progress: int, skipped: List[Dict[str, str]]):
+    """
+    Emit when files are skipped by the local pre-filter. Skips are batched:
+    "files" lists every skip since the last event, "filename" and "reason"
+    describe the latest one.
+    """
+    await emit_progress(review_id, {
+        "status": "file_skipped",
+        "progress": progress,
+        "filename": skipped[-1]["filename"],
+        "reason": skipped[-1]["reason"],
+        "files": skipped
     })
 
 
-async def emit_review_completed(review_id: int):
-    """Emit when entire review process is complete"""
+async def emit_review_completed(review_id: int, partial: bool = False):
+    """Emit when entire review process is complete; partial when a review budget ran out first"""
     logger.info(f"Review {review_id} completed successfully")
     await emit_progress(review_id, {
         "status": "completed",
         "progress": 100,
+        "review_id": review_id,
+        "partial": partial
+    })
+
+
+async def emit_review_cancelled(review_id: int, progress: int):
+    """Emit when review process is cancelled by the user"""
+    logger.info(f"Review {review_id} cancelled")
+    await emit_progress(review_id, {
+        "status": "cancelled",
+        "progress": progress,
         "review_id": review_id
     })
 
@@ -0,0 +1,21 @@
+from typing import Any, List
+
+# Celery is imported on first use: the API only needs it once a task is queued,
+# and importing it (with the task modules) at startup slows every API worker boot
+
+PROCESS_REVIEW_TASK = "tasks.process_review_task"
+PREWARM_REVIEW_TASK = "tasks.prewarm_review_task"
+
+
+def _celery_app():
+    from celery_config import celery_app
+    return celery_app
+
+
+def enqueue_task(name: str, args: List[Any], **options):
+    """Queue a task by name without importing its module; routing follows celery_config"""
+    return _celery_app().send_task(name, args=args, **options)
+
+
+def revoke_task(task_id: str):
+    _celery_app().control.revoke(task_id)
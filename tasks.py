@@ -3,21 +3,76 @@ from database import SessionLocal
 from models import User, Review
 import httpx
 import asyncio
-from ai_client import get_ai_review, parse_ai_response
+from ai_client import llm_clients, request_ai_review, review_usage, usage_stats
+from response_parser import parse_review_response, parse_stats
+from schemas import FileReviewResult, StructureReviewResult
 from prompts import FILE_STRUCTURE_PROMPT, FILE_REVIEW_PROMPT
+from file_classifier import (
+    ACTION_SKIP,
+    ACTION_DOWNGRADE,
+    classify_path,
+    classify_content,
+    parse_gitattributes
+)
+from path_matcher import DEFAULT_EXCLUDE_PATTERNS, PathMatcher, parse_ignore_file
+from tree_summary import summarize_tree
+from model_router import STAGE_STRUCTURE, STAGE_FILE, route_model
+from resilience import (
+    UPSTREAM_GITHUB,
+    UPSTREAM_LLM,
+    CircuitOpenError,
+    InvalidResponseError,
+    call_with_retries,
+    get_with_retries
+)
+from cancellation import is_cancellation_requested
+from analytics import record_review_issues
+from cache import async_redis_client
+from progress import ProgressReporter
+from near_duplicates import NearDuplicateIndex, minhash, project_review
+from pipeline import StageGraph
+from secret_scanner import scan_secrets, secret_review, merge_secret_findings
+from budget import EXHAUSTED_DEADLINE, ReviewBudget, estimate_file_review_tokens, file_value
+from memory_guard import MemoryGuard
+from repo_tree import parse_tree
+from push_webhook import pop_push
+from review_store import (
+    load_tree,
+    save_tree,
+    load_structure_review,
+    save_structure_review,
+    load_file_result,
+    save_file_result,
+    load_secret_scan,
+    load_secret_findings,
+    save_secret_findings
+)
 from socket_manager import (
     emit_fetching_files,
     emit_analyzing_structure,
     emit_structure_complete,
     emit_reviewing_file,
     emit_file_complete,
+    emit_file_skipped,
     emit_review_completed,
+    emit_review_cancelled,
     emit_review_failed
 )
 import json
 import logging
-from typing import Optional, Dict, List, Any
+import redis
+from typing import Optional, Dict, List, Any, Tuple
 import base64
+import time
+from collections import Counter, deque
+from contextlib import aclosing
+from config import (
+    NEAR_DUPLICATE_THRESHOLD,
+    BUDGET_MAX_CONCURRENCY,
+    BUDGET_MAX_FILES,
+    STREAMING_TREE_ENTRIES,
+    REVIEW_MAX_RSS_MB
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,9 +81,14 @@ logger = logging.getLogger(__name__)
 # Configuration constants
 MAX_FILES_TO_REVIEW = 20
 MAX_CONTENT_LENGTH = 5000
+DOWNGRADED_CONTENT_LENGTH = 1500
+MAX_FILES_TO_CLASSIFY = 100
+# Blobs fetched and classified ahead of the file being reviewed
+PREFETCH_WINDOW = 4
+STRUCTURE_TREE_TOKEN_BUDGET = 2000
 REQUEST_TIMEOUT = 30.0
 MAX_RETRIES = 3
-RETRY_DELAY = 1.0
+CANCEL_POLL_INTERVAL = 1.0
 
 # File extensions to review
 REVIEWABLE_EXTENSIONS = (
@@ -38,6 +98,23 @@ REVIEWABLE_EXTENSIONS = (
     '.swift', '.kt', '.scala'
 )
 
+# Repository files whose patterns exclude paths from review
+IGNORE_FILES = ('.gitignore', '.reviewignore')
+# Tree entries kept beyond their path: candidates for review and the files that select them
+SELECTION_FILES = ('.gitattributes',) + IGNORE_FILES
+
+# Config and key files that are never reviewed but are scanned for committed credentials
+SECRET_SCAN_EXTENSIONS = (
+    '.env', '.yml', '.yaml', '.json', '.toml', '.ini', '.cfg', '.conf',
+    '.properties', '.xml', '.pem', '.key', '.sh', '.tf', '.tfvars'
+)
+SECRET_SCAN_NAMES = ('.npmrc', '.pypirc', '.netrc', '.pgpass', 'credentials', 'id_rsa', 'id_dsa', 'id_ecdsa', 'id_ed25519')
+# Scanned first: files that hold credentials by design
+SECRET_SCAN_PRIORITY = ('.env', '.pem', '.key') + SECRET_SCAN_NAMES
+# Bounds of the scan-only pass: blobs fetched per review and the largest blob fetched
+MAX_FILES_TO_SCAN = 50
+MAX_SCAN_BLOB_BYTES = 256 * 1024
+
 # Common branch names to try
 DEFAULT_BRANCHES = ['main', 'master', 'develop', 'dev']
 
@@ -48,10 +125,10 @@ class ReviewError(Exception):
 
 
 @celery_app.task
-def process_review_task(review_id: int, user_id: int, repo_url: str):
-    """Celery task wrapper for processing reviews"""
+def process_review_task(review_id: int, user_id: int, repo_url: str, options: Optional[Dict[str, Any]] = None):
+    """Celery task wrapper for processing reviews; returns the review's metrics"""
     try:
-        asyncio.run(process_review(review_id, user_id, repo_url))
+        return asyncio.run(run_review(review_id, user_id, repo_url, options))
     except Exception as e:
         logger.error(f"Review task failed for review_id={review_id}: {str(e)}", exc_info=True)
         # Ensure the error is propagated to the database
@@ -65,9 +142,184 @@ def process_review_task(review_id: int, user_id: int, repo_url: str):
             db.close()
 
 
-async def process_review(review_id: int, user_id: int, repo_url: str):
-    """Main review processing function"""
+@celery_app.task
+def prewarm_review_task(user_id: int, full_name: str, branch: str):
+    """Celery task wrapper for push-webhook pre-reviews, routed to the low-priority prewarm queue"""
+    try:
+        asyncio.run(prewarm_review(user_id, full_name, branch))
+    except Exception as e:
+        logger.error(f"Pre-review failed for {full_name}@{branch}: {str(e)}", exc_info=True)
+
+
+async def prewarm_review(user_id: int, full_name: str, branch: str):
+    """
+    Run the tree, structure and file stages of a review without a review
+    record or progress events, filling the tree and result stores so a
+    later review of the same commit is served from them. Only the review
+    candidates the push added or modified are fetched and reviewed; unchanged
+    blobs are left for the full review.
+    """
+    push = pop_push(full_name, branch)
+    if push is None:
+        # An earlier task of the same burst already took it
+        return
+    head, changed_paths = push
+    
     db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        access_token = user.access_token if user else None
+    finally:
+        db.close()
+    
+    if not access_token:
+        logger.warning(f"Skipping pre-review of {full_name}: no access token for user_id={user_id}")
+        return
+    
+    owner, repo_name = full_name.split("/", 1)
+    reviewed = warmed = 0
+    
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client, llm_clients(), async_redis_client():
+        tree_data = await fetch_repository_tree(
+            client=client,
+            owner=owner,
+            repo_name=repo_name,
+            access_token=access_token,
+            branches=[branch]
+        )
+        
+        files = tree_data["files"]
+        files_by_path = {f["path"]: f for f in files}
+        paths = tree_data["paths"]
+        
+        async def structure_stage():
+            await analyze_structure(summarize_tree(paths, STRUCTURE_TREE_TOKEN_BUDGET), review_id=None)
+        
+        async def select_stage():
+            return await select_review_files(client, files, files_by_path, access_token, {})
+        
+        async def files_stage(selection):
+            nonlocal reviewed, warmed
+            gitattributes, code_files, _ = selection
+            
+            # Same filters and ordering as process_review, narrowed to the paths the push touched
+            changed = set(changed_paths)
+            targets = [f for f in code_files if f["path"] in changed][:MAX_FILES_TO_CLASSIFY]
+            if not targets:
+                return
+            
+            blobs = prefetch_blobs(client, targets, gitattributes, access_token)
+            async with aclosing(blobs):
+                async for file, stored, content, _, _ in blobs:
+                    if stored:
+                        reviewed += "file_review" in stored
+                    elif content is not None:
+                        try:
+                            await review_file(file_path=file["path"], content=content, review_id=None, sha=file.get("sha"))
+                            reviewed += 1
+                            warmed += 1
+                        except CircuitOpenError:
+                            raise
+                        except Exception as e:
+                            logger.warning(f"Failed to pre-review file {file['path']}: {str(e)}")
+                    
+                    if reviewed >= MAX_FILES_TO_REVIEW:
+                        break
+        
+        stages = StageGraph()
+        stages.add("structure", structure_stage)
+        stages.add("select", select_stage)
+        stages.add("files", files_stage, after=["select"])
+        await stages.run()
+    
+    logger.info(
+        f"Pre-reviewed {full_name}@{head[:7]}: {warmed} new blobs reviewed, "
+        f"{len(changed_paths)} paths changed in push"
+    )
+
+
+def cancellation_requested(review_id: int) -> bool:
+    try:
+        return is_cancellation_requested(review_id)
+    except redis.RedisError as e:
+        logger.warning(f"Could not check cancellation for review_id={review_id}: {str(e)}")
+        return False
+
+
+async def watch_for_cancellation(review_id: int, work: asyncio.Task, cancelled: asyncio.Event):
+    """Poll the cancel flag and cancel the running review as soon as it is set"""
+    while not work.done():
+        if cancellation_requested(review_id):
+            cancelled.set()
+            work.cancel()
+            return
+        await asyncio.sleep(CANCEL_POLL_INTERVAL)
+
+
+async def mark_review_cancelled(review_id: int):
+    """Mark a review cancelled, keeping whatever results were already saved"""
+    db = SessionLocal()
+    try:
+        review = db.query(Review).filter(Review.id == review_id).first()
+        if not review or review.status in ("completed", "failed"):
+            return
+        review.status = "cancelled"
+        db.commit()
+        progress = review.progress or 0
+    finally:
+        db.close()
+
+    logger.info(f"Review cancelled for review_id={review_id} at {progress}%")
+    await emit_review_cancelled(review_id, progress=progress)
+
+
+async def run_review(
+    review_id: int,
+    user_id: int,
+    repo_url: str,
+    options: Optional[Dict[str, Any]] = None
+):
+    """
+    Run process_review while watching for cancellation. In-flight GitHub and
+    LLM calls are cancelled with it, so the worker is freed within a poll interval.
+    Returns the review's metrics, or None if it was cancelled.
+    """
+    if cancellation_requested(review_id):
+        await mark_review_cancelled(review_id)
+        return
+
+    cancelled = asyncio.Event()
+    work = asyncio.create_task(process_review(review_id, user_id, repo_url, options))
+    watcher = asyncio.create_task(watch_for_cancellation(review_id, work, cancelled))
+    try:
+        return await work
+    except asyncio.CancelledError:
+        if not cancelled.is_set():
+            raise
+        await mark_review_cancelled(review_id)
+    finally:
+        watcher.cancel()
+
+
+async def process_review(
+    review_id: int,
+    user_id: int,
+    repo_url: str,
+    options: Optional[Dict[str, Any]] = None
+):
+    """Main review processing function; returns the review's metrics"""
+    options = options or {}
+    db = SessionLocal()
+    review = None
+    reporter = None
+    memory = MemoryGuard(REVIEW_MAX_RSS_MB)
+    
+    # Tokens spent by this review's LLM calls, for its budget
+    usage = Counter()
+    review_usage.set(usage)
+    budget = None
+    if options.get("deadline_seconds") or options.get("token_budget"):
+        budget = ReviewBudget(usage, options.get("deadline_seconds"), options.get("token_budget"))
     
     try:
         # Validate user and review existence
@@ -86,6 +338,7 @@ async def process_review(review_id: int, user_id: int, repo_url: str):
         review.status = "processing"
         review.progress = 0
         db.commit()
+        reporter = ProgressReporter(db, review)
         
         logger.info(f"Starting review for review_id={review_id}, repo={repo_url}")
         
@@ -99,10 +352,9 @@ async def process_review(review_id: int, user_id: int, repo_url: str):
         
         # Step 1: Fetch repository files
         await emit_fetching_files(review_id, progress=10)
-        review.progress = 10
-        db.commit()
+        reporter.update(10)
         
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
+        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client, llm_clients(), async_redis_client():
             # Get repository file tree
             tree_data = await fetch_repository_tree(
                 client=client,
@@ -111,97 +363,346 @@ async def process_review(review_id: int, user_id: int, repo_url: str):
                 access_token=user.access_token
             )
             
-            files = [item for item in tree_data.get("tree", []) if item["type"] == "blob"]
+            files = tree_data["files"]
+            files_by_path = {f["path"]: f for f in files}
             
-            # Create file tree string
-            file_tree = "\n".join([f["path"] for f in files])
+            # Budgeted tree summary for the prompt and clients
+            paths = tree_data["paths"]
+            tree_summary = summarize_tree(paths, STRUCTURE_TREE_TOKEN_BUDGET)
+            file_count = len(paths)
             
-            # Step 2: Analyze repository structure
-            await emit_analyzing_structure(review_id, progress=20, file_tree=file_tree)
-            review.progress = 20
-            db.commit()
+            # Streaming mode leaves file_tree empty: the full path list would be
+            # copied into every progress write of a very large repository
+            streaming = options.get("streaming")
+            if streaming is None:
+                streaming = file_count > STREAMING_TREE_ENTRIES
+            file_tree = "" if streaming else "\n".join(paths)
+            del tree_data, paths
+            memory.check()
             
-            structure_review = await analyze_structure(file_tree, review_id)
+            structure_review = None
+            file_reviews_dict = {}
+            # Scanner findings of files without a model review (yet)
+            secret_reviews = {}
+            skipped_files = []
+            projected_count = 0
             
-            await emit_structure_complete(
-                review_id,
-                progress=30,
-                structure_review=structure_review
-            )
-            review.progress = 30
-            db.commit()
+            def snapshot() -> Dict[str, Any]:
+                return {
+                    "file_tree": file_tree,
+                    "file_tree_summary": tree_summary,
+                    "file_count": file_count,
+                    "streaming": streaming,
+                    "structure_review": structure_review,
+                    "file_reviews": list(file_reviews_dict.values()) + [
+                        scan_review for path, scan_review in secret_reviews.items() if path not in file_reviews_dict
+                    ],
+                    "skipped_files": skipped_files,
+                    "total_files_reviewed": len(file_reviews_dict)
+                }
             
-            # Update review in database with structure analysis
-            review.review_content = json.dumps({
-                "file_tree": file_tree,
-                "structure_review": structure_review,
-                "file_reviews": []
-            })
-            db.commit()
+            # Step 2: Analyze repository structure, overlapped with step 3
+            await emit_analyzing_structure(review_id, progress=20, file_tree=tree_summary)
+            reporter.update(20)
             
-            # Step 3: Review individual files
-            code_files = filter_reviewable_files(files)
-            total_files = min(len(code_files), MAX_FILES_TO_REVIEW)
+            # File events are held back until structure_complete has been sent,
+            # so clients see the same event order as a sequential review
+            structure_sent = False
+            held_events = []
             
-            file_reviews_dict = {}
+            async def emit_file_event(emit, **kwargs):
+                if structure_sent:
+                    await emit(review_id, **kwargs)
+                elif emit is not emit_reviewing_file:
+                    # reviewing_file only names the current file, so a late one is dropped
+                    held_events.append((emit, kwargs))
             
-            for idx, file in enumerate(code_files[:MAX_FILES_TO_REVIEW]):
-                progress = 30 + int((idx / total_files) * 60)
+            async def release_file_events():
+                nonlocal structure_sent
+                while held_events:
+                    emit, kwargs = held_events.pop(0)
+                    await emit(review_id, **kwargs)
+                structure_sent = True
+            
+            async def structure_stage():
+                nonlocal structure_review
+                structure_review = await analyze_structure(tree_summary, review_id)
                 
-                await emit_reviewing_file(
+                # File work may already have moved progress past 30; held events follow
+                # this one, so it must not be ahead of them
+                progress = max(30, review.progress or 0)
+                await emit_structure_complete(
                     review_id,
-                    progress=progress,
-                    current_file=file["path"],
-                    completed=idx,
-                    total=total_files
+                    progress=held_events[0][1]["progress"] if held_events else progress,
+                    structure_review=structure_review
                 )
+                await release_file_events()
                 
-                try:
-                    file_review = await review_file(
-                        client=client,
-                        file=file,
-                        access_token=user.access_token,
-                        review_id=review_id
+                # Structure analysis is a checkpoint worth keeping if the review stops early
+                reporter.update(progress, content=snapshot(), force=True)
+            
+            async def report_secrets(file: Dict[str, Any], findings: List[Dict[str, Any]]):
+                """Scanner findings are sent at once; a reviewed file's model review is merged with them later"""
+                secret_reviews[file["path"]] = secret_review(file["path"], findings)
+                await emit_file_event(
+                    emit_file_complete,
+                    progress=max(30, review.progress or 0),
+                    file_review=secret_reviews[file["path"]]
+                )
+            
+            # Step 3: Review individual files
+            async def select_stage():
+                return await select_review_files(
+                    client, files, files_by_path, user.access_token, options
+                )
+            
+            async def files_stage(selection):
+                nonlocal projected_count
+                gitattributes, code_files, _ = selection
+                
+                max_files = MAX_FILES_TO_REVIEW
+                window = PREFETCH_WINDOW
+                if budget:
+                    # Most valuable files first, in case the budget runs out before the list does
+                    code_files = sorted(code_files, key=lambda f: file_value(f, MAX_CONTENT_LENGTH), reverse=True)
+                    max_files = BUDGET_MAX_FILES
+                    window += BUDGET_MAX_CONCURRENCY
+                total_files = min(len(code_files), max_files)
+                
+                threshold = options.get("near_duplicate_threshold")
+                threshold = NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+                near_duplicates = NearDuplicateIndex(threshold) if threshold > 0 else None
+                
+                # In-flight model reviews: task -> (file, review content, signature, reserved tokens, start time)
+                in_flight = {}
+                
+                def concurrency() -> int:
+                    if not budget or memory.constrained:
+                        return 1
+                    return budget.concurrency(max(total_files - len(file_reviews_dict), 1))
+                
+                async def record(file: Dict[str, Any], file_review: Dict[str, Any]):
+                    progress = 30 + int((len(file_reviews_dict) / total_files) * 60)
+                    replaces = file["path"] in secret_reviews
+                    if replaces:
+                        file_review = merge_secret_findings(file_review, secret_reviews[file["path"]]["issues"])
+                    file_reviews_dict[file["path"]] = file_review
+                    
+                    await emit_file_event(
+                        emit_file_complete,
+                        progress=progress + 1,
+                        file_review=file_review,
+                        replaces=replaces
                     )
                     
-                    if file_review:
-                        file_reviews_dict[file["path"]] = file_review
-                        
-                        await emit_file_complete(
-                            review_id,
-                            progress=progress + 1,
-                            file_review=file_review
-                        )
-                        
-                        # Update database incrementally
-                        review.review_content = json.dumps({
-                            "file_tree": file_tree,
-                            "structure_review": structure_review,
-                            "file_reviews": list(file_reviews_dict.values()),
-                            "total_files_reviewed": len(file_reviews_dict)
-                        })
-                        review.progress = progress + 1
-                        db.commit()
+                    # Update database incrementally, coalesced by the reporter
+                    reporter.update(progress + 1, content=snapshot())
+                
+                async def collect():
+                    """Wait for at least one in-flight review and record what finished"""
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        file, review_content, signature, tokens, started = in_flight.pop(task)
+                        if budget:
+                            budget.release(tokens, time.monotonic() - started)
+                        try:
+                            file_review = task.result()
+                        except CircuitOpenError:
+                            raise
+                        except Exception as e:
+                            logger.warning(f"Failed to review file {file['path']}: {str(e)}")
+                            continue
                         
-                except Exception as e:
-                    logger.warning(f"Failed to review file {file['path']}: {str(e)}")
-                    # Continue with other files even if one fails
-                    continue
+                        if near_duplicates and file_review and "model" in file_review:
+                            near_duplicates.add(signature, review_content, file_review)
+                        if file_review:
+                            await record(file, file_review)
+                
+                # Skipped files do not count against the review limit, but the
+                # number of blobs fetched just for classification is bounded.
+                # Once the limit is reached, the remaining blobs are only scanned for secrets.
+                reviewing = True
+                blobs = prefetch_blobs(
+                    client,
+                    code_files[:MAX_FILES_TO_CLASSIFY * max_files // MAX_FILES_TO_REVIEW],
+                    gitattributes,
+                    user.access_token,
+                    window=window,
+                    memory=memory
+                )
+                try:
+                    async with aclosing(blobs):
+                        async for file, stored, content, skip_reason, secrets in blobs:
+                            if memory.check():
+                                logger.warning(
+                                    f"Stopping review_id={review_id} at the memory limit "
+                                    f"({REVIEW_MAX_RSS_MB} MB of growth) with {len(file_reviews_dict)} files reviewed"
+                                )
+                                break
+                            if secrets:
+                                await report_secrets(file, secrets)
+                            if not reviewing:
+                                continue
+                            
+                            # Without a deadline one review runs at a time, so near-duplicates
+                            # always see every earlier representative
+                            while in_flight and (
+                                len(in_flight) >= concurrency()
+                                or len(file_reviews_dict) + len(in_flight) >= max_files
+                            ):
+                                await collect()
+                            if len(file_reviews_dict) >= max_files:
+                                reviewing = False
+                                continue
+                            
+                            completed = len(file_reviews_dict)
+                            progress = 30 + int((completed / total_files) * 60)
+                            
+                            try:
+                                if skip_reason:
+                                    skipped_files.append({"filename": file["path"], "reason": skip_reason})
+                                    reporter.add_skipped(file["path"], skip_reason)
+                                    skipped_batch = reporter.take_skipped()
+                                    if skipped_batch:
+                                        await emit_file_event(emit_file_skipped, progress=progress, skipped=skipped_batch)
+                                    continue
+                                
+                                if stored is None and content is None:
+                                    continue
+                                
+                                if reporter.emit_due():
+                                    await emit_file_event(
+                                        emit_reviewing_file,
+                                        progress=progress,
+                                        current_file=file["path"],
+                                        completed=completed,
+                                        total=total_files
+                                    )
+                                
+                                if stored:
+                                    await record(file, {**stored["file_review"], "filename": file["path"]})
+                                    continue
+                                
+                                # Near-identical files reuse the review of the first one sent to the model
+                                review_content = content[:MAX_CONTENT_LENGTH]
+                                signature = minhash(review_content) if near_duplicates else None
+                                match = near_duplicates.find(signature) if near_duplicates else None
+                                if match:
+                                    rep_content, rep_review, similarity = match
+                                    await record(file, project_review(rep_review, rep_content, review_content, file["path"], similarity))
+                                    projected_count += 1
+                                    continue
+                                
+                                tokens, policy = 0, None
+                                if budget:
+                                    tokens = estimate_file_review_tokens(review_content)
+                                    if not budget.reserve(tokens):
+                                        if budget.exhausted_by == EXHAUSTED_DEADLINE:
+                                            break
+                                        reviewing = False
+                                        continue
+                                    policy = budget.routing_policy()
+                                
+                                review_task = asyncio.create_task(review_file(
+                                    file_path=file["path"],
+                                    content=content,
+                                    review_id=review_id,
+                                    # Results of a budget-forced small model are not reused by later reviews
+                                    sha=None if policy else file.get("sha"),
+                                    policy=policy
+                                ))
+                                in_flight[review_task] = (file, review_content, signature, tokens, time.monotonic())
+                                
+                            except CircuitOpenError:
+                                raise
+                            except Exception as e:
+                                logger.warning(f"Failed to review file {file['path']}: {str(e)}")
+                                # Continue with other files even if one fails
+                                continue
+                    
+                    while in_flight:
+                        await collect()
+                finally:
+                    for review_task in in_flight:
+                        review_task.cancel()
+            
+            async def secrets_stage(selection):
+                # Config and key files are only scanned, never sent to the model
+                semaphore = asyncio.Semaphore(PREFETCH_WINDOW)
+                
+                async def scan(file: Dict[str, Any]):
+                    async with semaphore:
+                        return file, await scan_blob(client, file, user.access_token)
+                
+                scans = [asyncio.create_task(scan(file)) for file in selection[2]]
+                try:
+                    for scanned in asyncio.as_completed(scans):
+                        file, findings = await scanned
+                        if findings:
+                            await report_secrets(file, findings)
+                finally:
+                    for scan_task in scans:
+                        scan_task.cancel()
+            
+            # The structure call does not feed file reviews, so its latency hides behind file work
+            stages = StageGraph()
+            stages.add("structure", structure_stage)
+            stages.add("select", select_stage)
+            stages.add("files", files_stage, after=["select"])
+            stages.add("secrets", secrets_stage, after=["select"])
+            deadline = budget.remaining_seconds() if budget else None
+            if deadline is None:
+                await stages.run()
+            else:
+                try:
+                    await asyncio.wait_for(stages.run(), deadline)
+                except asyncio.TimeoutError:
+                    # A timeout raised inside the stages is an error, not the deadline
+                    if budget.remaining_seconds() > 0:
+                        raise
+                    # Finish with what was recorded so far
+                    budget.exhausted_by = EXHAUSTED_DEADLINE
+            
+            # Structure analysis cut off by the deadline never released them
+            await release_file_events()
+            skipped_batch = reporter.take_skipped(force=True)
+            if skipped_batch:
+                await emit_file_skipped(review_id, progress=90, skipped=skipped_batch)
             
             # Step 4: Complete review
-            final_result = {
-                "file_tree": file_tree,
-                "structure_review": structure_review,
-                "file_reviews": list(file_reviews_dict.values()),
-                "total_files_reviewed": len(file_reviews_dict)
-            }
+            final_result = snapshot()
+            if structure_review is None:
+                final_result["structure_review"] = {
+                    "overall_rating": "needs_improvement",
+                    "failed": True,
+                    "issues": [],
+                    "strengths": [],
+                    "recommendations": ["Structure analysis did not finish within the review's time budget"]
+                }
+            partial_reason = "memory" if memory.exceeded else (budget.exhausted_by if budget else None)
+            partial = partial_reason is not None
+            final_result["partial"] = partial
+            if partial:
+                final_result["partial_reason"] = partial_reason
+            if budget:
+                final_result["budget"] = budget.summary()
             
+            reporter.discard()
             review.review_content = json.dumps(final_result)
             review.status = "completed"
             review.progress = 100
+            record_review_issues(db, review, final_result)
             db.commit()
             
-            await emit_review_completed(review_id)
+            await emit_review_completed(review_id, partial=partial)
+            logger.info(
+                f"LLM usage after review_id={review_id}: {dict(usage_stats)}, "
+                f"responses: {dict(parse_stats)}, progress writes: {reporter.writes}, "
+                f"near-duplicate reviews reused: {projected_count}, "
+                f"files with secrets: {len(secret_reviews)}, "
+                f"budget: {budget.summary() if budget else None}, "
+                f"streaming: {streaming}, memory: {memory.summary()}"
+            )
             
     except ReviewError as e:
         logger.error(f"Review error for review_id={review_id}: {str(e)}")
@@ -209,6 +710,15 @@ async def process_review(review_id: int, user_id: int, repo_url: str):
         db.commit()
         await emit_review_failed(review_id, error=str(e))
         
+    except CircuitOpenError as e:
+        logger.error(f"Upstream unavailable for review_id={review_id}: {str(e)}")
+        review.status = "failed"
+        db.commit()
+        await emit_review_failed(
+            review_id,
+            error=f"A required service is temporarily unavailable ({e.upstream}). Please try again in a moment."
+        )
+        
     except httpx.HTTPError as e:
         logger.error(f"HTTP error for review_id={review_id}: {str(e)}")
         review.status = "failed"
@@ -228,28 +738,62 @@ async def process_review(review_id: int, user_id: int, repo_url: str):
         )
         
     finally:
+        # Keep partial results that were not written yet, e.g. when the review is cancelled
+        if reporter is not None:
+            try:
+                reporter.flush()
+            except Exception as e:
+                logger.warning(f"Failed to save pending progress for review_id={review_id}: {str(e)}")
+        status = review.status if review is not None else "failed"
         db.close()
+    
+    # Returned as the Celery task result
+    return {
+        "review_id": review_id,
+        "status": status,
+        **memory.summary(),
+        "tokens": usage["tokens"],
+        "progress_writes": reporter.writes if reporter else 0
+    }
 
 
 async def fetch_repository_tree(
     client: httpx.AsyncClient,
     owner: str,
     repo_name: str,
-    access_token: str
+    access_token: str,
+    branches: Optional[List[str]] = None
 ) -> Dict[str, Any]:
-    """Fetch repository file tree from GitHub API"""
-    headers = {"Authorization": f"Bearer {access_token}"}
+    """
+    Fetch repository file tree from GitHub API, parsed into blob paths and
+    the entries of review candidates (see repo_tree.parse_tree). The last
+    tree seen for a branch is stored and revalidated with its ETag; an
+    unchanged tree answers 304 and does not count against the rate limit.
+    """
+    branches = branches or DEFAULT_BRANCHES
     
     # Try different branch names
-    for branch in DEFAULT_BRANCHES:
+    for branch in branches:
+        headers = {"Authorization": f"Bearer {access_token}"}
+        stored = load_tree(owner, repo_name, branch)
+        if stored:
+            headers["If-None-Match"] = stored["etag"]
+        
         try:
-            response = await client.get(
+            response = await get_with_retries(
+                client,
+                UPSTREAM_GITHUB,
                 f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/{branch}?recursive=1",
-                headers=headers
+                headers=headers,
+                max_attempts=MAX_RETRIES
             )
             
-            if response.status_code == 200:
-                return response.json()
+            if response.status_code == 304 and stored:
+                return stored["tree"]
+            elif response.status_code == 200:
+                tree_data = parse_tree(response.content, is_tree_candidate)
+                save_tree(owner, repo_name, branch, response.headers.get("etag"), tree_data)
+                return tree_data
             elif response.status_code == 404:
                 continue  # Try next branch
             else:
@@ -261,66 +805,153 @@ async def fetch_repository_tree(
             raise
     
     # If all branches fail, raise error
-    raise ReviewError(f"Could not find repository tree. Tried branches: {', '.join(DEFAULT_BRANCHES)}")
+    raise ReviewError(f"Could not find repository tree. Tried branches: {', '.join(branches)}")
+
+
+def is_secret_scan_candidate(path: str) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return name.startswith(".env") or name in SECRET_SCAN_NAMES or path.endswith(SECRET_SCAN_EXTENSIONS)
+
+
+def is_tree_candidate(path: str) -> bool:
+    return path.endswith(REVIEWABLE_EXTENSIONS) or path in SELECTION_FILES or is_secret_scan_candidate(path)
 
 
-def filter_reviewable_files(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Filter files to only include reviewable code files"""
+async def select_review_files(
+    client: httpx.AsyncClient,
+    files: List[Dict[str, Any]],
+    files_by_path: Dict[str, Dict[str, Any]],
+    access_token: str,
+    options: Dict[str, Any]
+) -> Tuple[list, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Apply .gitattributes, ignore files and request patterns; returns
+    (gitattributes rules, code files, files only scanned for secrets)
+    """
+    gitattributes_content = await fetch_repository_file(
+        client, files_by_path, ".gitattributes", access_token
+    )
+    gitattributes = parse_gitattributes(gitattributes_content or "")
+    
+    exclude_patterns = list(DEFAULT_EXCLUDE_PATTERNS)
+    for ignore_file in IGNORE_FILES:
+        ignore_content = await fetch_repository_file(
+            client, files_by_path, ignore_file, access_token
+        )
+        exclude_patterns.extend(parse_ignore_file(ignore_content or ""))
+    exclude_patterns.extend(options.get("exclude_patterns") or [])
+    
+    exclude = PathMatcher(exclude_patterns)
+    code_files = filter_reviewable_files(
+        files,
+        exclude=exclude,
+        include=PathMatcher(options.get("include_patterns") or [])
+    )
+    return gitattributes, code_files, filter_secret_scan_files(files, exclude)
+
+
+def filter_reviewable_files(
+    files: List[Dict[str, Any]],
+    exclude: Optional[PathMatcher] = None,
+    include: Optional[PathMatcher] = None
+) -> List[Dict[str, Any]]:
+    """
+    Filter files to only include reviewable code files.
+    Excluded paths are dropped; when include patterns are given, only matching paths are kept.
+    """
+    if exclude is None:
+        exclude = PathMatcher(DEFAULT_EXCLUDE_PATTERNS)
+    
     reviewable_files = []
     
     for file in files:
         path = file["path"]
         
-        # Skip files in common directories to ignore
-        if any(skip in path for skip in ['node_modules/', 'venv/', '.git/', 'dist/', 'build/', '__pycache__/']):
+        # Check if file has a reviewable extension
+        if not path.endswith(REVIEWABLE_EXTENSIONS):
             continue
         
-        # Check if file has a reviewable extension
-        if path.endswith(REVIEWABLE_EXTENSIONS):
-            reviewable_files.append(file)
+        if exclude.matches(path):
+            continue
+        
+        if include and not include.matches(path):
+            continue
+        
+        reviewable_files.append(file)
     
     return reviewable_files
 
 
-async def analyze_structure(file_tree: str, review_id: int) -> Dict[str, Any]:
-    """Analyze repository structure using AI"""
+def filter_secret_scan_files(
+    files: List[Dict[str, Any]],
+    exclude: Optional[PathMatcher] = None
+) -> List[Dict[str, Any]]:
+    """
+    Config and key files to scan for secrets without a review: at most
+    MAX_FILES_TO_SCAN of them, credential files first, and none larger
+    than MAX_SCAN_BLOB_BYTES.
+    """
+    if exclude is None:
+        exclude = PathMatcher(DEFAULT_EXCLUDE_PATTERNS)
+    
+    scan_files = [
+        file for file in files
+        if is_secret_scan_candidate(file["path"])
+        and not file["path"].endswith(REVIEWABLE_EXTENSIONS)
+        and (file.get("size") or 0) <= MAX_SCAN_BLOB_BYTES
+        and not exclude.matches(file["path"])
+    ]
+    
+    def priority(file: Dict[str, Any]) -> int:
+        name = file["path"].rsplit("/", 1)[-1]
+        return 0 if name.startswith(".env") or name.endswith(SECRET_SCAN_PRIORITY) else 1
+    
+    return sorted(scan_files, key=priority)[:MAX_FILES_TO_SCAN]
+
+
+async def analyze_structure(file_tree: str, review_id: Optional[int]) -> Dict[str, Any]:
+    """Analyze repository structure using AI, reusing a stored analysis of the same tree"""
+    stored = load_structure_review(file_tree)
+    if stored:
+        return stored
+    
     try:
         structure_prompt = FILE_STRUCTURE_PROMPT.format(file_tree=file_tree)
+        routing = route_model(STAGE_STRUCTURE, file_tree)
+        
+        async def attempt() -> Dict[str, Any]:
+            structure_review = await request_ai_review(structure_prompt, model=routing["model"])
+            
+            # Validate against the schema, repairing near-miss responses before re-calling the model
+            structure_result = parse_review_response(structure_review, StructureReviewResult)
+            if structure_result is None:
+                raise InvalidResponseError("Invalid structure review response")
+            return structure_result
         
         # Get AI review with retry logic
-        for attempt in range(MAX_RETRIES):
-            try:
-                structure_review = get_ai_review(structure_prompt)
-                structure_result = parse_ai_response(structure_review)
-                
-                # Validate response has required fields
-                if "overall_rating" in structure_result and "issues" in structure_result:
-                    return structure_result
-                else:
-                    logger.warning(f"Invalid structure review response (attempt {attempt + 1})")
-                    if attempt < MAX_RETRIES - 1:
-                        await asyncio.sleep(RETRY_DELAY)
-                        continue
-                    
-            except Exception as e:
-                logger.warning(f"Structure analysis attempt {attempt + 1} failed: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                    continue
-                raise
+        try:
+            structure_result = await call_with_retries(UPSTREAM_LLM, attempt, MAX_RETRIES, "Structure analysis")
+        except InvalidResponseError:
+            # Return default structure if all retries fail
+            return {
+                "overall_rating": "needs_improvement",
+                "failed": True,
+                "issues": [],
+                "strengths": [],
+                "recommendations": ["Unable to complete full analysis"]
+            }
         
-        # Return default structure if all retries fail
-        return {
-            "overall_rating": "needs_improvement",
-            "issues": [],
-            "strengths": [],
-            "recommendations": ["Unable to complete full analysis"]
-        }
+        structure_result["model"] = routing["model"]
+        save_structure_review(file_tree, structure_result)
+        return structure_result
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Structure analysis failed for review_id={review_id}: {str(e)}")
         return {
             "overall_rating": "needs_improvement",
+            "failed": True,
             "issues": [{
                 "type": "structure",
                 "severity": "warning",
@@ -332,86 +963,222 @@ async def analyze_structure(file_tree: str, review_id: int) -> Dict[str, Any]:
         }
 
 
-async def review_file(
+async def fetch_file_content(
     client: httpx.AsyncClient,
     file: Dict[str, Any],
-    access_token: str,
-    review_id: int
-) -> Optional[Dict[str, Any]]:
-    """Review a single file using AI"""
+    access_token: str
+) -> Optional[str]:
+    """Fetch and decode a blob's content from GitHub API"""
     file_path = file["path"]
     
-    try:
-        
-        # Fetch file content
-        content_response = await client.get(
-            file["url"],
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        if content_response.status_code != 200:
-            logger.warning(f"Failed to fetch content for {file_path}: {content_response.status_code}")
+    content_response = await get_with_retries(
+        client,
+        UPSTREAM_GITHUB,
+        file["url"],
+        headers={"Authorization": f"Bearer {access_token}"},
+        max_attempts=MAX_RETRIES
+    )
+    
+    if content_response.status_code != 200:
+        logger.warning(f"Failed to fetch content for {file_path}: {content_response.status_code}")
+        return None
+    
+    file_data = content_response.json()
+    
+    # Decode content
+    if file_data.get("encoding") == "base64":
+        try:
+            return base64.b64decode(file_data["content"]).decode("utf-8", errors="ignore")
+        except Exception as e:
+            logger.warning(f"Failed to decode {file_path}: {str(e)}")
             return None
+    
+    return file_data.get("content", "")
+
+
+async def classify_blob(
+    client: httpx.AsyncClient,
+    file: Dict[str, Any],
+    access_token: str
+) -> Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]:
+    """
+    Fetch a blob, scan it for secrets and classify its content. Returns
+    (content, skip_reason, secret findings); content is None for skipped or
+    unavailable blobs and is truncated for downgraded ones. The whole blob
+    is scanned, whatever is later skipped or truncated. Content-based skips
+    and findings are stored by blob sha.
+    """
+    content = await fetch_file_content(client, file, access_token)
+    if content is None:
+        return None, None, []
+    
+    secrets = scan_secrets(content)
+    save_secret_findings(file.get("sha"), secrets)
+    
+    action, reason = classify_content(file["path"], content)
+    if action == ACTION_SKIP:
+        save_file_result(file.get("sha"), skip_reason=reason)
+        return None, reason, secrets
+    if action == ACTION_DOWNGRADE:
+        logger.info(f"Downgrading {file['path']} ({reason}) to a reduced review")
+        content = content[:DOWNGRADED_CONTENT_LENGTH]
+    return content, None, secrets
+
+
+async def prefetch_blobs(
+    client: httpx.AsyncClient,
+    files: List[Dict[str, Any]],
+    gitattributes: list,
+    access_token: str,
+    window: int = PREFETCH_WINDOW,
+    memory: Optional[MemoryGuard] = None
+):
+    """
+    Yield (file, stored result, content, skip_reason, secret findings) for
+    each file, in order, while up to window later blobs are already being
+    looked up, fetched, scanned and classified; only one blob is held at a
+    time once memory is constrained. Files that fail to load are logged and
+    yielded with nothing set. Use with aclosing() so in-flight fetches are
+    cancelled when the consumer stops early.
+    """
+    async def load(file: Dict[str, Any]):
+        skip_reason = classify_path(file["path"], gitattributes)
+        if skip_reason:
+            return None, None, skip_reason, []
         
-        file_data = content_response.json()
-        
-        # Decode content
-        if file_data.get("encoding") == "base64":
-            try:
-                content = base64.b64decode(file_data["content"]).decode("utf-8", errors="ignore")
-            except Exception as e:
-                logger.warning(f"Failed to decode {file_path}: {str(e)}")
-                return None
-        else:
-            content = file_data.get("content", "")
-        
+        try:
+            # Blobs already reviewed, for example by a push pre-review, need no fetch or model call
+            stored = load_file_result(file.get("sha"))
+            if stored:
+                return stored, None, stored.get("skip_reason"), load_secret_findings(file.get("sha"))
+            
+            return (None, *await classify_blob(client, file, access_token))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to fetch file {file['path']}: {str(e)}")
+            return None, None, None, []
+    
+    remaining = iter(files)
+    in_flight = deque()
+    try:
+        while True:
+            while len(in_flight) < (1 if memory and memory.constrained else window + 1):
+                file = next(remaining, None)
+                if file is None:
+                    break
+                in_flight.append((file, asyncio.create_task(load(file))))
+            
+            if not in_flight:
+                return
+            
+            file, task = in_flight.popleft()
+            yield (file, *await task)
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+
+
+async def scan_blob(
+    client: httpx.AsyncClient,
+    file: Dict[str, Any],
+    access_token: str
+) -> List[Dict[str, Any]]:
+    """Secret findings of a blob that is not reviewed, fetched only if it was not scanned before"""
+    findings = load_secret_scan(file.get("sha"))
+    if findings is not None:
+        return findings
+    
+    try:
+        content = await fetch_file_content(client, file, access_token)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to fetch {file['path']} for secret scanning: {str(e)}")
+        return []
+    if content is None:
+        return []
+    
+    findings = scan_secrets(content)
+    save_secret_findings(file.get("sha"), findings, keep_empty=True)
+    return findings
+
+
+async def fetch_repository_file(
+    client: httpx.AsyncClient,
+    files_by_path: Dict[str, Dict[str, Any]],
+    path: str,
+    access_token: str
+) -> Optional[str]:
+    """Fetch a repository file such as .gitignore by path, returning None if absent"""
+    file = files_by_path.get(path)
+    if not file:
+        return None
+    
+    try:
+        return await fetch_file_content(client, file, access_token)
+    except httpx.HTTPError as e:
+        logger.warning(f"Failed to fetch {path}: {str(e)}")
+        return None
+
+
+async def review_file(
+    file_path: str,
+    content: str,
+    review_id: Optional[int],
+    sha: Optional[str] = None,
+    policy: Optional[Dict[str, str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Review a single file using AI, storing successful results under the blob sha"""
+    try:
         # Truncate content if too long
         if len(content) > MAX_CONTENT_LENGTH:
             content = content[:MAX_CONTENT_LENGTH]
         
-        # Get AI review with retry logic
-        for attempt in range(MAX_RETRIES):
-            try:
-                file_prompt = FILE_REVIEW_PROMPT.format(
-                    filename=file_path,
-                    content=content
-                )
-                
-                file_review = get_ai_review(file_prompt)
-                file_result = parse_ai_response(file_review)
-                
-                # Validate response has required fields
-                if "filename" in file_result and "issues" in file_result:
-                    return file_result
-                else:
-                    logger.warning(f"Invalid file review response for {file_path} (attempt {attempt + 1})")
-                    if attempt < MAX_RETRIES - 1:
-                        await asyncio.sleep(RETRY_DELAY)
-                        continue
-                        
-            except Exception as e:
-                logger.warning(f"File review attempt {attempt + 1} failed for {file_path}: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                    continue
-                raise
+        routing = route_model(STAGE_FILE, content, policy)
         
-        # Return minimal review if all retries fail
-        return {
-            "filename": file_path,
-            "issues": [],
-            "summary": {
-                "total_issues": 0,
-                "critical": 0,
-                "warnings": 0,
-                "info": 0
+        file_prompt = FILE_REVIEW_PROMPT.format(
+            filename=file_path,
+            content=content
+        )
+        
+        async def attempt() -> Dict[str, Any]:
+            file_review = await request_ai_review(file_prompt, model=routing["model"])
+            
+            # Validate against the schema, repairing near-miss responses before re-calling the model
+            file_result = parse_review_response(file_review, FileReviewResult, {"filename": file_path})
+            if file_result is None:
+                raise InvalidResponseError(f"Invalid file review response for {file_path}")
+            return file_result
+        
+        # Get AI review with retry logic
+        try:
+            file_result = await call_with_retries(UPSTREAM_LLM, attempt, MAX_RETRIES, f"File review for {file_path}")
+        except InvalidResponseError:
+            # Return minimal review if all retries fail
+            return {
+                "filename": file_path,
+                "failed": True,
+                "issues": [],
+                "summary": {
+                    "total_issues": 0,
+                    "critical": 0,
+                    "warnings": 0,
+                    "info": 0
+                }
             }
-        }
         
+        file_result["model"] = routing["model"]
+        save_file_result(sha, file_review=file_result)
+        return file_result
+        
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Failed to review file {file_path}: {str(e)}")
         return {
             "filename": file_path,
+            "failed": True,
             "issues": [{
                 "type": "bug",
                 "severity": "warning",
@@ -0,0 +1,40 @@
+from near_duplicates import CONFIDENCE_LOW, project_review
+
+
+def review(*lines):
+    return {
+        "filename": "a.py",
+        "issues": [{"line": line, "type": "style", "severity": "info", "message": "m", "suggestion": ""} for line in lines]
+    }
+
+
+def test_issues_on_deleted_trailing_lines_stay_inside_the_target():
+    source = "\n".join(f"line {i}" for i in range(10))
+    target = "\n".join(f"line {i}" for i in range(7))
+
+    projected = project_review(review(2, 9, 10), source, target, "b.py", 0.9)
+
+    lines = [issue["line"] for issue in projected["issues"]]
+    assert lines == [2, 7, 7]
+    assert all(1 <= line <= 7 for line in lines)
+    assert projected["issues"][1]["confidence"] == CONFIDENCE_LOW
+    assert "confidence" not in projected["issues"][0]
+
+
+def test_issues_on_deleted_leading_lines_point_at_the_first_line():
+    source = "\n".join(f"line {i}" for i in range(10))
+    target = "\n".join(f"line {i}" for i in range(3, 10))
+
+    projected = project_review(review(1, 5), source, target, "b.py", 0.9)
+
+    assert [issue["line"] for issue in projected["issues"]] == [1, 2]
+
+
+def test_issues_on_replaced_lines_point_into_the_changed_region():
+    source = "a\nb\nc\nd"
+    target = "a\nx\ny\nd"
+
+    projected = project_review(review(2, 3, 4), source, target, "b.py", 0.9)
+
+    assert [issue["line"] for issue in projected["issues"]] == [2, 3, 4]
+    assert projected["issues"][2].get("confidence") is None
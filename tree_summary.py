@@ -0,0 +1,174 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+# Rough characters-per-token ratio used to turn token budgets into string lengths
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Progressively coarser (max_depth, max_files, max_dirs) limits, tried in order
+SUMMARY_LEVELS = (
+    (None, 12, 40),
+    (8, 8, 30),
+    (6, 5, 20),
+    (4, 3, 15),
+    (3, 2, 10),
+    (2, 0, 10),
+    (1, 0, 10),
+    (0, 0, 0),
+)
+
+TOP_EXTENSIONS = 4
+INDENT = "  "
+
+
+class _Node:
+    __slots__ = ("dirs", "files", "total", "extensions")
+
+    def __init__(self):
+        self.dirs: Dict[str, "_Node"] = {}
+        self.files: List[str] = []
+        self.total = 0
+        self.extensions: Optional[Counter] = None
+
+
+def _extension(name: str) -> str:
+    dot = name.rfind(".")
+    return name[dot:] if dot > 0 else "(none)"
+
+
+def _build_tree(paths: List[str]) -> _Node:
+    # Group by directory first so per-node work scales with directories, not files
+    by_directory: Dict[str, List[str]] = defaultdict(list)
+    for path in paths:
+        directory, _, name = path.rpartition("/")
+        by_directory[directory].append(name)
+
+    root = _Node()
+    nodes = {"": root}
+
+    def node_for(directory: str) -> _Node:
+        node = nodes.get(directory)
+        if node is None:
+            parent, _, name = directory.rpartition("/")
+            node = nodes[directory] = _Node()
+            node_for(parent).dirs[name] = node
+        return node
+
+    for directory, names in by_directory.items():
+        node = node_for(directory)
+        node.files = names
+        node.total = len(names)
+
+    # Roll subtree totals up from the deepest directories
+    for directory in sorted(nodes, key=lambda d: d.count("/") if d else -1, reverse=True):
+        if not directory:
+            continue
+        node = nodes[directory]
+        parent = nodes[directory.rpartition("/")[0]]
+        parent.total += node.total
+
+    return root
+
+
+def _extensions(node: _Node) -> Counter:
+    # Computed on demand: only directories that end up described pay for it
+    if node.extensions is None:
+        extensions = Counter(map(_extension, node.files))
+        for child in node.dirs.values():
+            extensions.update(_extensions(child))
+        node.extensions = extensions
+    return node.extensions
+
+
+def _describe(node: _Node) -> str:
+    extensions = ", ".join(f"{ext} {count}" for ext, count in _extensions(node).most_common(TOP_EXTENSIONS))
+    return f"{node.total} files: {extensions}"
+
+
+def _render(
+    node: _Node,
+    depth: int,
+    max_depth: Optional[int],
+    max_files: int,
+    max_dirs: int,
+    lines: List[str],
+    limit: int,
+    size: int
+) -> int:
+    indent = INDENT * depth
+
+    dir_names = sorted(node.dirs)
+    for name in dir_names[:max_dirs]:
+        child = node.dirs[name]
+
+        # Collapse chains of single-child directories such as src/main/java/com
+        label = name
+        while len(child.dirs) == 1 and not child.files:
+            sub_name, sub_child = next(iter(child.dirs.items()))
+            label = f"{label}/{sub_name}"
+            child = sub_child
+
+        if max_depth is not None and depth + 1 >= max_depth:
+            line = f"{indent}{label}/ ({_describe(child)})"
+        else:
+            line = f"{indent}{label}/ ({child.total} files)"
+
+        lines.append(line)
+        size += len(line) + 1
+        if size > limit:
+            return size
+
+        if max_depth is None or depth + 1 < max_depth:
+            size = _render(child, depth + 1, max_depth, max_files, max_dirs, lines, limit, size)
+            if size > limit:
+                return size
+
+    hidden_dirs = dir_names[max_dirs:]
+    if hidden_dirs:
+        hidden_total = sum(node.dirs[name].total for name in hidden_dirs)
+        line = f"{indent}... {len(hidden_dirs)} more directories ({hidden_total} files)"
+        lines.append(line)
+        size += len(line) + 1
+
+    files = sorted(node.files)
+    for name in files[:max_files]:
+        lines.append(f"{indent}{name}")
+        size += len(indent) + len(name) + 1
+
+    hidden_files = files[max_files:]
+    if hidden_files:
+        extensions = Counter(map(_extension, hidden_files))
+        summary = ", ".join(f"{ext} {count}" for ext, count in extensions.most_common(TOP_EXTENSIONS))
+        line = f"{indent}... {len(hidden_files)} more files ({summary})"
+        lines.append(line)
+        size += len(line) + 1
+
+    return size
+
+
+def summarize_tree(paths: List[str], token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    Build a compact, indented view of a repository tree that fits a token budget.
+
+    Small trees are returned unchanged as a newline-separated path list. Larger
+    trees collapse single-child directory chains, report file counts and the
+    most common extensions per directory, and sample file names, getting
+    coarser until the result fits the budget.
+    """
+    limit = token_budget * CHARS_PER_TOKEN
+
+    size = sum(len(path) + 1 for path in paths)
+    if size <= limit:
+        return "\n".join(paths)
+
+    root = _build_tree(paths)
+    header = f"({_describe(root)})"
+
+    for max_depth, max_files, max_dirs in SUMMARY_LEVELS:
+        lines = [header]
+        rendered = _render(root, 0, max_depth, max_files, max_dirs, lines, limit, len(header) + 1)
+        if rendered <= limit:
+            return "\n".join(lines)
+
+    # Even the top level does not fit; truncate the coarsest rendering
+    return "\n".join(lines)[:limit]